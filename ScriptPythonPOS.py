@@ -23,9 +23,6 @@ import logging
 import sys
 import argparse
 import os
-# Supprimer TOUS les avertissements et messages
-warnings.filterwarnings("ignore")
-logging.getLogger().setLevel(logging.CRITICAL)
 
 from escpos.printer import Serial
 from PIL import Image, ImageEnhance
@@ -148,7 +145,35 @@ def print_with_paper_check(printer, optimized_img, filename, high_density, botto
     
     return True
 
+def run(image_file, text=None, hd=False, port='/dev/ttyAMA0', baudrate=9600):
+    """Imprimer une image (utilisable depuis l'application sans sous-processus)
+
+    Retourne False si l'impression est annulée faute de papier. Les erreurs
+    de connexion ou d'impression sont propagées à l'appelant.
+    """
+    if not os.path.exists(image_file):
+        raise FileNotFoundError(f"Image '{image_file}' non trouvée")
+    
+    printer = connect_printer(port, baudrate)
+    try:
+        # Traitement de l'image
+        optimized_img = optimize_image(image_file, hd)
+        
+        # Impression avec vérification du papier
+        return print_with_paper_check(printer, optimized_img,
+                                      os.path.basename(image_file),
+                                      hd, text)
+    finally:
+        try:
+            printer.close()
+        except:
+            pass
+
 def main():
+    # Supprimer TOUS les avertissements et messages (mode ligne de commande uniquement)
+    warnings.filterwarnings("ignore")
+    logging.getLogger().setLevel(logging.CRITICAL)
+    
     # Parser les arguments
     args = parse_arguments()
     
@@ -158,40 +183,20 @@ def main():
         print(f"Erreur: Image '{image_file}' non trouvée")
         return
     
-    # Mode densité et texte
-    high_density = args.hd
-    bottom_text = args.text
-    
-    # Paramètres de connexion
-    printer_port = args.port
-    printer_baudrate = args.baudrate
-    
     # Connexion et impression
     try:
-        printer = connect_printer(printer_port, printer_baudrate)
-        
-        # Traitement de l'image
-        optimized_img = optimize_image(image_file, high_density)
-        
-        # Impression avec vérification du papier
-        success = print_with_paper_check(printer, optimized_img, 
-                                       os.path.basename(image_file), 
-                                       high_density, bottom_text)
-        
-        if success:
-            print("✅ Impression terminée")
-            sys.exit(0)  # Succès
-        else:
-            print("❌ Impression annulée - Plus de papier")
-            sys.exit(2)  # Code d'erreur spécifique pour manque de papier
-        
+        success = run(image_file, text=args.text, hd=args.hd,
+                      port=args.port, baudrate=args.baudrate)
     except Exception as e:
         print(f"Erreur: {e}")
-    finally:
-        try:
-            printer.close()
-        except:
-            pass
+        return
+    
+    if success:
+        print("✅ Impression terminée")
+        sys.exit(0)  # Succès
+    else:
+        print("❌ Impression annulée - Plus de papier")
+        sys.exit(2)  # Code d'erreur spécifique pour manque de papier
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -16,11 +16,15 @@ import subprocess
 import sys
 import threading
 import time
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
+from urllib.parse import quote
 
-import requests
+import aiohttp
 from flask import (
     Flask,
     Response,
@@ -30,14 +34,16 @@ from flask import (
     redirect,
     render_template,
     request,
-    send_file,
     send_from_directory,
     url_for,
 )
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import NotFound
 from runware import Runware, IImageInference
 from config_utils import (
     PHOTOS_FOLDER,
     EFFECT_FOLDER,
+    get_runtime_config,
     load_config,
     save_config,
     ensure_directories,
@@ -48,7 +54,7 @@ from storage_usb import (
     ensure_usb_folder_exists,
     get_usb_mount_point,
     list_usb_photos,
-    save_photo_to_usb,
+    save_photo_to_usb_async,
     delete_usb_photo,
 )
 from usb_utils import (
@@ -57,11 +63,50 @@ from usb_utils import (
     find_usb_root,
     list_directory as usb_list_directory,
     make_directory as usb_make_directory,
+    test_write_access as usb_test_write_access,
+    write_file as usb_write_file,
 )
 
+try:
+    from websockets.exceptions import ConnectionClosed
+except ImportError:  # pragma: no cover - dépendance transitive de runware
+    ConnectionClosed = ConnectionError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+try:
+    import pybase64 as _b64
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    _b64 = base64
+
 os.umask(0o022)
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Sérialiseur JSON Flask basé sur orjson, avec repli sur json."""
+
+    def dumps(self, obj, **kwargs):
+        option = 0
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        except TypeError:
+            # Clés non textuelles ou entiers hors 64 bits : laisser json gérer
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'photobooth_secret_key_2024')
 
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
@@ -95,12 +140,19 @@ _set_usb_paths(_resolve_usb_root())
 ensure_directories()
 
 CAMERA_SERVER_URL = os.environ.get('CAMERA_SERVER_URL', 'http://localhost:8080')
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PATH = os.path.join(APP_DIR, 'ScriptPythonPOS.py')
 
-def _get_effective_user() -> str:
+@lru_cache(maxsize=4)
+def _resolve_user(uid: int) -> str:
     try:
-        return pwd.getpwuid(os.geteuid()).pw_name
+        return pwd.getpwuid(uid).pw_name
     except Exception:
-        return str(os.geteuid())
+        return str(uid)
+
+
+def _get_effective_user() -> str:
+    return _resolve_user(os.geteuid())
 
 
 def usb_health(root: Path) -> dict:
@@ -173,6 +225,15 @@ def log_usb_environment() -> None:
 log_usb_environment()
 
 
+def _dump_json_bytes(content) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            pass
+    return json.dumps(content, ensure_ascii=False).encode('utf-8')
+
+
 def _parse_save_payload(payload: Optional[dict]):
     if not payload:
         raise ValueError("Requête JSON vide")
@@ -190,7 +251,7 @@ def _parse_save_payload(payload: Optional[dict]):
         if not isinstance(content, str):
             raise ValueError("Le contenu base64 doit être une chaîne")
         try:
-            data = base64.b64decode(content, validate=True)
+            data = _b64.b64decode(content, validate=True)
         except (binascii.Error, ValueError) as exc:
             raise ValueError("Contenu base64 invalide") from exc
     elif encoding == 'text':
@@ -198,7 +259,7 @@ def _parse_save_payload(payload: Optional[dict]):
             raise ValueError("Le contenu texte doit être une chaîne")
         data = content.encode('utf-8')
     elif encoding == 'json':
-        data = json.dumps(content, ensure_ascii=False).encode('utf-8')
+        data = _dump_json_bytes(content)
     else:
         raise ValueError("Encodage non supporté")
 
@@ -223,25 +284,42 @@ def _usb_unavailable_response(exc: UsbUnavailableError):
     )
 
 
-def _format_usb_os_error(exc: OSError, target_path: Optional[Path]) -> str:
-    user_name = _get_effective_user()
-    parent_candidate: Optional[Path]
-    if target_path is not None:
-        parent_candidate = target_path.parent
-    elif SAVE_DIR is not None:
-        parent_candidate = SAVE_DIR
-    elif USB_ROOT is not None:
-        parent_candidate = USB_ROOT
-    else:
-        parent_candidate = Path('/')
+class _UsbErrorContext:
+    """Contexte d'une erreur d'écriture USB, formaté seulement à l'affichage.
+
+    Les appels système (resolve, access, exists) ne sont faits que si le
+    message est réellement journalisé ou sérialisé.
+    """
+
+    __slots__ = ('exc', 'target_path')
+
+    def __init__(self, exc: OSError, target_path: Optional[Path]) -> None:
+        self.exc = exc
+        self.target_path = target_path
+
+    def __str__(self) -> str:
+        user_name = _get_effective_user()
+        parent_candidate: Optional[Path]
+        if self.target_path is not None:
+            parent_candidate = self.target_path.parent
+        elif SAVE_DIR is not None:
+            parent_candidate = SAVE_DIR
+        elif USB_ROOT is not None:
+            parent_candidate = USB_ROOT
+        else:
+            parent_candidate = Path('/')
+
+        parent_path = parent_candidate.resolve(strict=False) if parent_candidate else Path('/')
+        writable = os.access(parent_path, os.W_OK)
+        exists = parent_path.exists()
+        return (
+            f"Erreur lors de l'écriture sur la clé USB: {self.exc} "
+            f"(user={user_name}, path={parent_path}, exists={exists}, writable={writable})"
+        )
 
-    parent_path = parent_candidate.resolve(strict=False) if parent_candidate else Path('/')
-    writable = os.access(parent_path, os.W_OK)
-    exists = parent_path.exists()
-    return (
-        f"Erreur lors de l'écriture sur la clé USB: {exc} "
-        f"(user={user_name}, path={parent_path}, exists={exists}, writable={writable})"
-    )
+
+def _format_usb_os_error(exc: OSError, target_path: Optional[Path]) -> _UsbErrorContext:
+    return _UsbErrorContext(exc, target_path)
 
 def check_printer_status():
     """Vérifier l'état de l'imprimante thermique"""
@@ -306,7 +384,15 @@ def check_printer_status():
 
 
 # Fonction pour détecter les ports série disponibles
-def detect_serial_ports():
+def detect_serial_ports(force=False):
+    """Retourne les ports série détectés (scan unique, ``force`` pour relancer)"""
+    if force:
+        _detect_serial_ports_cached.cache_clear()
+    return list(_detect_serial_ports_cached())
+
+
+@lru_cache(maxsize=1)
+def _detect_serial_ports_cached():
     """Détecte les ports série disponibles sur le système"""
     available_ports = []
     
@@ -343,12 +429,24 @@ def detect_serial_ports():
         else:
             available_ports = [('/dev/ttyAMA0', '/dev/ttyAMA0'), ('/dev/ttyS0', '/dev/ttyS0')]
     
-    return available_ports
+    return tuple(available_ports)
+
+
+@dataclass(frozen=True)
+class CurrentPhoto:
+    """Photo en cours et dossier dans lequel elle a été enregistrée."""
+
+    folder: str
+    filename: str
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.folder, self.filename)
 
 
 # Variables globales
 config = load_config()
-current_photo = None
+current_photo: Optional[CurrentPhoto] = None
 camera_active = False
 camera_process = None
 usb_camera = None
@@ -359,13 +457,78 @@ def index():
     """Page principale avec aperçu vidéo"""
     return render_template('index.html', timer=config['timer_seconds'])
 
-# Variable globale pour stocker la dernière frame MJPEG
+# Variable globale pour stocker la dernière frame MJPEG (un seul producteur,
+# l'affectation de la référence est atomique : pas de verrou nécessaire)
 last_frame = None
-frame_lock = threading.Lock()
+
+# Boucle asyncio persistante pour les appels réseau asynchrones (Runware, HTTP) :
+# la session aiohttp et le client Runware y restent ouverts entre deux requêtes.
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_loop_lock = threading.Lock()
+_http_session: Optional[aiohttp.ClientSession] = None
+_runware_lock: Optional[asyncio.Lock] = None
+_runware_client: Optional[Runware] = None
+_runware_api_key: Optional[str] = None
+
+
+def _get_async_loop() -> asyncio.AbstractEventLoop:
+    """Retourne la boucle asyncio de fond, démarrée au premier appel."""
+    global _async_loop
+
+    with _async_loop_lock:
+        if _async_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='async-loop', daemon=True).start()
+            _async_loop = loop
+    return _async_loop
+
+
+def run_async(coro):
+    """Exécute une coroutine sur la boucle de fond et attend son résultat."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_async_loop()).result()
 
 
-def fetch_plan_b_frame(camera_server_base: str, timeout: float = 5.0) -> Optional[bytes]:
-    """Récupère un cliché JPEG depuis le service caméra local."""
+async def _get_http_session() -> aiohttp.ClientSession:
+    """Session aiohttp partagée (keep-alive), créée au premier usage."""
+    global _http_session
+
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession()
+    return _http_session
+
+
+async def _get_runware_client(api_key: str) -> Runware:
+    """Client Runware partagé : la connexion n'est établie qu'une seule fois."""
+    global _runware_lock, _runware_client, _runware_api_key
+
+    if _runware_lock is None:
+        _runware_lock = asyncio.Lock()
+    async with _runware_lock:
+        if _runware_client is None or _runware_api_key != api_key:
+            logger.debug("[DEBUG IA] Connexion à Runware...")
+            client = Runware(api_key=api_key)
+            await client.connect()
+            _runware_client = client
+            _runware_api_key = api_key
+            logger.debug("[DEBUG IA] Connexion établie avec succès")
+    return _runware_client
+
+
+async def _drop_runware_client(client: Runware) -> None:
+    """Oublie un client Runware dont la connexion a été fermée."""
+    global _runware_client
+
+    async with _runware_lock:
+        if _runware_client is client:
+            _runware_client = None
+    try:
+        await client.disconnect()
+    except Exception:
+        pass
+
+
+async def fetch_plan_b_frame_async(camera_server_base: str, timeout: float = 5.0) -> Optional[bytes]:
+    """Récupère un cliché JPEG depuis le service caméra local (session partagée)."""
 
     if not camera_server_base:
         return None
@@ -374,18 +537,15 @@ def fetch_plan_b_frame(camera_server_base: str, timeout: float = 5.0) -> Optiona
     logger.info("[PLAN B] Capture d'une frame via %s", snapshot_url)
 
     try:
-        response = requests.get(snapshot_url, timeout=timeout)
-        if response.status_code != 200:
-            logger.warning(
-                "[PLAN B] Service caméra a répondu %s: %s",
-                response.status_code,
-                response.text,
-            )
-            return None
-        return response.content
-    except requests.Timeout:
+        session = await _get_http_session()
+        async with session.get(snapshot_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                logger.warning("[PLAN B] Service caméra a répondu %s", response.status)
+                return None
+            return await response.read()
+    except asyncio.TimeoutError:
         logger.error("[PLAN B] Timeout lors de l'appel au service caméra")
-    except requests.RequestException as exc:
+    except aiohttp.ClientError as exc:
         logger.error("[PLAN B] Erreur HTTP vers le service caméra: %s", exc)
     except Exception as exc:  # pragma: no cover - sécurité supplémentaire
         logger.exception("[PLAN B] Erreur inattendue: %s", exc)
@@ -393,17 +553,79 @@ def fetch_plan_b_frame(camera_server_base: str, timeout: float = 5.0) -> Optiona
     return None
 
 
+# Écriture des photos sur la carte SD hors du thread de requête
+_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='photo-writer')
+_pending_writes = {}
+_pending_writes_lock = threading.Lock()
+
+# Envois Telegram bornés à deux en parallèle, même en rafale
+_telegram_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='telegram')
+
+
+def _atomic_write(filepath: str, data: bytes) -> None:
+    """Écrit dans un fichier temporaire puis le renomme à sa place."""
+
+    tmp_path = f'{filepath}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_photo(filepath: str, data: bytes) -> None:
+    try:
+        _atomic_write(filepath, data)
+    except Exception as exc:
+        logger.error("Erreur lors de l'écriture de %s: %s", filepath, exc)
+        raise
+    finally:
+        with _pending_writes_lock:
+            _pending_writes.pop(os.path.basename(filepath), None)
+
+
+def queue_photo_write(filepath: str, data: bytes) -> Future:
+    """Planifie l'écriture d'une photo sur le thread d'écriture dédié."""
+
+    with _pending_writes_lock:
+        future = _write_pool.submit(_write_photo, filepath, data)
+        _pending_writes[os.path.basename(filepath)] = future
+    return future
+
+
+def wait_for_photo_write(filename: str, timeout: float = 5.0) -> None:
+    """Attend la fin de l'écriture en cours d'une photo, si nécessaire."""
+
+    with _pending_writes_lock:
+        future = _pending_writes.get(filename)
+    if future is None:
+        return
+    try:
+        future.result(timeout=timeout)
+    except Exception as exc:
+        logger.info("Écriture de %s non terminée: %s", filename, exc)
+
+
 def _resolve_current_photo_path() -> Optional[Path]:
     """Retourne le chemin absolu de la photo en cours."""
 
     if not current_photo:
         return None
 
-    for folder in (PHOTOS_FOLDER, EFFECT_FOLDER):
-        photo_path = Path(folder) / current_photo
-        if photo_path.exists():
-            return photo_path
-    return None
+    wait_for_photo_write(current_photo.filename)
+    return Path(current_photo.path)
+
+
+def _photo_timestamp() -> str:
+    """Horodatage à la microseconde pour des noms de photo uniques."""
+
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{nanos // 1000:06d}"
 
 @app.route('/capture', methods=['POST'])
 def capture_photo():
@@ -412,8 +634,7 @@ def capture_photo():
 
     try:
         # Générer un nom de fichier unique
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'photo_{timestamp}.jpg'
+        filename = f'photo_{_photo_timestamp()}.jpg'
         filepath = os.path.join(PHOTOS_FOLDER, filename)
 
         frame_bytes: Optional[bytes] = None
@@ -428,14 +649,13 @@ def capture_photo():
             requested_plan_b = bool(request_data.get('planB'))
             camera_server_base = request_data.get('cameraServerBase') or CAMERA_SERVER_URL
 
-            # Capturer la frame actuelle du flux MJPEG
-            with frame_lock:
-                frame_bytes = last_frame
+            # Capturer la frame actuelle du flux MJPEG (lecture de référence atomique)
+            frame_bytes = last_frame
 
             use_plan_b = requested_plan_b or frame_bytes is None
 
             if use_plan_b:
-                plan_b_frame = fetch_plan_b_frame(camera_server_base)
+                plan_b_frame = run_async(fetch_plan_b_frame_async(camera_server_base))
                 if plan_b_frame is None:
                     logger.info("Plan B indisponible pour la capture")
                     error_message = (
@@ -445,27 +665,27 @@ def capture_photo():
                     return jsonify({'success': False, 'error': error_message})
 
                 frame_bytes = plan_b_frame
-                with frame_lock:
-                    last_frame = frame_bytes
 
             if frame_bytes is None:
                 logger.info("Aucune frame disponible dans le flux")
                 return jsonify({'success': False, 'error': 'Aucune frame disponible'})
 
-        with frame_lock:
-            last_frame = frame_bytes
+        last_frame = frame_bytes
 
-        # Sauvegarder la frame directement
-        with open(filepath, 'wb') as f:
-            f.write(frame_bytes)
+        # Sauvegarder la frame en arrière-plan
+        write_future = queue_photo_write(filepath, frame_bytes)
 
-        current_photo = filename
+        current_photo = CurrentPhoto(PHOTOS_FOLDER, filename)
         logger.info(f"Frame MJPEG capturée avec succès: {filename}")
 
-        # Envoyer sur Telegram si activé
-        send_type = config.get('telegram_send_type', 'photos')
+        # Envoyer sur Telegram si activé, une fois la photo écrite
+        send_type = get_runtime_config().telegram_send_type
         if send_type in ['photos', 'both']:
-            threading.Thread(target=send_to_telegram, args=(filepath, config, "photo")).start()
+            def send_when_written(future):
+                if future.exception() is None:
+                    _telegram_pool.submit(send_to_telegram, filepath, config, "photo")
+
+            write_future.add_done_callback(send_when_written)
 
         return jsonify({'success': True, 'filename': filename})
 
@@ -478,14 +698,54 @@ def review_photo():
     """Page de révision de la photo"""
     if not current_photo:
         return redirect(url_for('index'))
-    return render_template('review.html', photo=current_photo, config=config)
+    return render_template('review.html', photo=current_photo.filename, config=config)
+
+
+_USB_HEALTH_TTL_SECONDS = 1.5
+_usb_health_cache = {'ts': 0.0, 'health': None}
+_usb_health_lock = threading.Lock()
+
+
+def _cached_usb_health() -> dict:
+    """Retourne l'état USB, recalculé au plus toutes les 1,5 secondes.
+
+    Les états en erreur sont aussi mis en cache pour que le polling de l'UI
+    ne relance pas une détection complète à chaque requête.
+    """
+
+    with _usb_health_lock:
+        now = time.monotonic()
+        health = _usb_health_cache['health']
+        if health is None or now - _usb_health_cache['ts'] >= _USB_HEALTH_TTL_SECONDS:
+            health = usb_health(USB_ROOT)
+            _usb_health_cache.update(ts=now, health=health)
+        return health
+
+
+def _probe_usb_write(health: dict) -> dict:
+    """Vérifie l'écriture réelle sur la clé et complète ``health``."""
+
+    # Nom unique (pid + compteur, O_EXCL) : deux requêtes simultanées ne se gênent pas
+    error = usb_test_write_access(health['path'])
+    if error is None:
+        health['write_test'] = True
+    else:
+        health.update(ok=False, writable=False, write_test=False,
+                      message=f"Écriture impossible sur la clé USB: {error}")
+    return health
 
 
 @app.route('/usb/health', methods=['GET'])
 def usb_health_status():
     """Indique l'état courant du point de montage USB."""
 
-    health = dict(usb_health(USB_ROOT))
+    test_write_enabled = request.args.get('test_write', '').lower() in ('1', 'true', 'yes', 'on')
+    if test_write_enabled:
+        health = dict(usb_health(USB_ROOT))
+        if health.get('ok'):
+            _probe_usb_write(health)
+    else:
+        health = dict(_cached_usb_health())
     health['user'] = _get_effective_user()
     health['success'] = health.get('ok', False)
     health['save_dir'] = str(SAVE_DIR)
@@ -590,12 +850,13 @@ def usb_save_route():
             relative = Path(subdir)
             if relative.is_absolute() or any(part in ('', '.', '..') for part in relative.parts):
                 raise ValueError("Sous-dossier invalide")
-            target_dir = base_dir / relative
-            target_dir.mkdir(parents=True, exist_ok=True)
             resolved_base = base_dir.resolve()
-            resolved_target = target_dir.resolve()
-            if not str(resolved_target).startswith(str(resolved_base)):
+            resolved_target = (base_dir / relative).resolve()
+            # Préfixe terminé par un séparateur : "sauvegardes2" n'est pas
+            # sous "sauvegardes". Vérifié avant de créer quoi que ce soit.
+            if not str(resolved_target).startswith(os.path.join(str(resolved_base), '')):
                 raise ValueError("Sous-dossier hors du dossier de sauvegarde")
+            resolved_target.mkdir(parents=True, exist_ok=True)
             target_dir = resolved_target
         else:
             target_dir = base_dir.resolve()
@@ -605,11 +866,11 @@ def usb_save_route():
             raise ValueError("Nom de fichier invalide")
 
         target_path = target_dir / safe_name
-        target_path.write_bytes(data)
+        usb_write_file(target_path, data, durable=True)
     except ValueError as exc:
         return jsonify({'ok': False, 'success': False, 'message': str(exc)}), 400
     except OSError as exc:
-        logger.error("[USB] Erreur lors de la sauvegarde USB: %s", exc)
+        logger.error("[USB] %s", _format_usb_os_error(exc, target_path))
         return jsonify({'ok': False, 'success': False, 'message': str(exc)}), 500
 
     try:
@@ -629,6 +890,19 @@ def usb_save_route():
     }), 200
 
 
+USB_SAVE_TIMEOUT_SECONDS = 10.0
+
+
+def _log_usb_save_result(future: Future) -> None:
+    """Journalise l'issue d'une sauvegarde USB terminée après la réponse."""
+
+    exc = future.exception()
+    if exc is not None:
+        logger.error("[USB] Échec de la sauvegarde en arrière-plan: %s", exc)
+    else:
+        logger.info("Photo sauvegardée sur USB: %s", future.result())
+
+
 @app.route('/save_photo_usb', methods=['POST'])
 @app.route('/print_photo', methods=['POST'])
 def save_photo_usb_route():
@@ -638,14 +912,25 @@ def save_photo_usb_route():
     if not photo_path:
         return jsonify({'success': False, 'error': 'Aucune photo à sauvegarder'})
 
+    # Écritures USB sérialisées sur le thread dédié ; une clé lente ne bloque
+    # pas la requête au-delà du délai, la copie se termine en arrière-plan
+    future = save_photo_to_usb_async(photo_path)
     try:
-        saved_path = save_photo_to_usb(photo_path)
+        saved_path = future.result(timeout=USB_SAVE_TIMEOUT_SECONDS)
         logger.info("Photo sauvegardée sur USB: %s", saved_path)
         return jsonify({
             'success': True,
             'message': 'Photo sauvegardée avec succès',
             'path': str(saved_path),
         })
+    except FuturesTimeoutError:
+        future.add_done_callback(_log_usb_save_result)
+        logger.info("[USB] Sauvegarde de %s toujours en cours", photo_path)
+        return jsonify({
+            'success': True,
+            'pending': True,
+            'message': 'Sauvegarde en cours sur la clé USB',
+        }), 202
     except UsbUnavailableError as exc:
         return _usb_unavailable_response(exc)
     except FileNotFoundError as exc:
@@ -671,8 +956,10 @@ def usb_photos():
 
     try:
         photos = list_usb_photos()
+        # Construire le préfixe d'URL une seule fois plutôt qu'un url_for par photo
+        url_prefix = url_for('serve_usb_photo', filename='_')[:-1]
         for photo in photos:
-            photo['url'] = url_for('serve_usb_photo', filename=photo['name'])
+            photo['url'] = url_prefix + quote(photo['name'])
         mount_point = get_usb_mount_point()
         return jsonify({
             'success': True,
@@ -692,22 +979,35 @@ def usb_photos():
         return jsonify({'success': False, 'error': str(exc)}), 500
 
 
+# Dossier photo USB mémorisé entre deux requêtes de la galerie
+_USB_FOLDER_TTL_SECONDS = 2.0
+_usb_folder_cache = {'ts': 0.0, 'folder': None}
+
+
+def _cached_usb_folder() -> Path:
+    """Retourne le dossier photo USB, revalidé au plus toutes les 2 secondes."""
+
+    now = time.monotonic()
+    folder = _usb_folder_cache['folder']
+    if folder is None or now - _usb_folder_cache['ts'] >= _USB_FOLDER_TTL_SECONDS:
+        folder = ensure_usb_folder_exists()
+        _usb_folder_cache.update(ts=now, folder=folder)
+    return folder
+
+
 @app.route('/usb/photo/<path:filename>', methods=['GET'])
 def serve_usb_photo(filename):
     """Servez une photo stockée sur la clé USB."""
 
     try:
-        folder = ensure_usb_folder_exists()
+        folder = _cached_usb_folder()
     except FileNotFoundError:
         abort(404)
 
-    safe_folder = folder.resolve()
-    target = (folder / filename).resolve()
-    if not str(target).startswith(str(safe_folder)):
-        abort(404)
-    if not target.exists() or target.is_dir():
-        abort(404)
-    return send_file(target)
+    # send_from_directory applique safe_join et renvoie 404 hors du dossier.
+    # Les photos USB ne changent pas une fois écrites : la galerie peut les
+    # garder en cache une heure sans relire la clé.
+    return send_from_directory(folder, filename, conditional=True, max_age=3600)
 
 
 @app.route('/usb/photo/<path:filename>', methods=['DELETE'])
@@ -736,15 +1036,10 @@ def delete_current_photo():
     global current_photo
     
     if current_photo:
+        wait_for_photo_write(current_photo.filename)
         try:
-            # Chercher la photo dans le bon dossier
-            photo_path = None
-            if os.path.exists(os.path.join(PHOTOS_FOLDER, current_photo)):
-                photo_path = os.path.join(PHOTOS_FOLDER, current_photo)
-            elif os.path.exists(os.path.join(EFFECT_FOLDER, current_photo)):
-                photo_path = os.path.join(EFFECT_FOLDER, current_photo)
-            
-            if photo_path and os.path.exists(photo_path):
+            photo_path = current_photo.path
+            if os.path.exists(photo_path):
                 os.remove(photo_path)
                 current_photo = None
                 return jsonify({'success': True})
@@ -763,128 +1058,269 @@ def apply_effect():
     if not current_photo:
         return jsonify({'success': False, 'error': 'Aucune photo à traiter'})
     
-    if not config.get('effect_enabled', False):
+    runtime_config = get_runtime_config()
+    if not runtime_config.effect_enabled:
         return jsonify({'success': False, 'error': 'Les effets sont désactivés'})
     
-    if not config.get('runware_api_key'):
+    if not runtime_config.runware_api_key:
         return jsonify({'success': False, 'error': 'Clé API Runware manquante'})
     
     try:
         # Chemin de la photo actuelle
-        photo_path = os.path.join(PHOTOS_FOLDER, current_photo)
+        wait_for_photo_write(current_photo.filename)
+        photo_path = current_photo.path
         
         if not os.path.exists(photo_path):
             return jsonify({'success': False, 'error': 'Photo introuvable'})
         
-        # Exécuter la fonction asynchrone
-        result = asyncio.run(apply_effect_async(photo_path))
-        return result
+        # Exécuter la fonction asynchrone sur la boucle partagée
+        result = run_async(apply_effect_async(photo_path))
+        return jsonify(result)
             
     except Exception as e:
         logger.info(f"Erreur lors de l'application de l'effet: {e}")
         return jsonify({'success': False, 'error': f'Erreur IA: {str(e)}'})
 
+# Taille des blocs lus pour l'encodage base64 (multiple de 3 : pas de padding intermédiaire)
+_B64_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def _encode_data_uri(photo_path: str, mime_type: str = 'image/jpeg') -> str:
+    """Encode un fichier en data URI base64 dans un tampon préalloué."""
+
+    prefix = f"data:{mime_type};base64,".encode('ascii')
+    size = os.path.getsize(photo_path)
+    buffer = bytearray(len(prefix) + ((size + 2) // 3) * 4)
+    buffer[:len(prefix)] = prefix
+    view = memoryview(buffer)
+    offset = len(prefix)
+
+    chunk = bytearray(_B64_CHUNK_SIZE)
+    with open(photo_path, 'rb') as img_file:
+        while True:
+            read = img_file.readinto(chunk)
+            if not read:
+                break
+            encoded = _b64.b64encode(memoryview(chunk)[:read])
+            view[offset:offset + len(encoded)] = encoded
+            offset += len(encoded)
+
+    return str(view[:offset], 'ascii')
+
+
+async def _prepare_reference_image(runware: Runware, photo_path: str) -> str:
+    """Retourne la référence Runware de la photo source.
+
+    Le SDK sait téléverser un fichier et renvoyer son UUID : la photo n'est
+    alors plus embarquée dans la requête d'inférence. À défaut, on retombe
+    sur un data URI base64.
+    """
+
+    upload_image = getattr(runware, 'uploadImage', None)
+    if upload_image is not None:
+        uploaded = await upload_image(photo_path)
+        image_uuid = getattr(uploaded, 'imageUUID', None)
+        if image_uuid:
+            return image_uuid
+    return _encode_data_uri(photo_path)
+
+
 async def apply_effect_async(photo_path):
-    """Fonction asynchrone pour appliquer l'effet IA"""
+    """Fonction asynchrone pour appliquer l'effet IA (retourne le payload JSON)"""
     global current_photo
+    runtime_config = get_runtime_config()
     
     try:
-        logger.info("[DEBUG IA] Début de l'application de l'effet IA")
-        logger.info(f"[DEBUG IA] Photo source: {photo_path}")
-        logger.info(f"[DEBUG IA] Clé API configurée: {'Oui' if config.get('runware_api_key') else 'Non'}")
-        logger.info(f"[DEBUG IA] Prompt: {config.get('effect_prompt', 'Transform this photo into a beautiful ghibli style')}")
+        logger.debug("[DEBUG IA] Début de l'application de l'effet IA")
+        logger.debug("[DEBUG IA] Photo source: %s", photo_path)
+        logger.debug("[DEBUG IA] Prompt: %s", runtime_config.effect_prompt)
         
-        # Initialiser Runware
-        logger.info("[DEBUG IA] Initialisation de Runware...")
-        runware = Runware(api_key=config['runware_api_key'])
-        logger.info("[DEBUG IA] Connexion à Runware...")
-        await runware.connect()
-        logger.info("[DEBUG IA] Connexion établie avec succès")
-        
-        # Lire et encoder l'image en base64
-        logger.info("[DEBUG IA] Lecture et encodage de l'image...")
-        with open(photo_path, 'rb') as img_file:
-            img_data = img_file.read()
-            img_base64 = base64.b64encode(img_data).decode('utf-8')
-        logger.info(f"[DEBUG IA] Image encodée: {len(img_base64)} caractères base64")
-        
-        # Préparer la requête d'inférence avec referenceImages (requis pour ce modèle)
-        logger.info("[DEBUG IA] Préparation de la requête d'inférence avec referenceImages...")
-        request = IImageInference(
-            positivePrompt=config.get('effect_prompt', 'Transforme cette image en illustration de style Studio Ghibli'),
-            referenceImages=[f"data:image/jpeg;base64,{img_base64}"],
-            model="runware:106@1",
-            height=752, 
-            width=1392,  
-            steps=config.get('effect_steps', 5),
-            CFGScale=2.5,
-            numberResults=1
-        )
-        logger.info("[DEBUG IA] Requête préparée avec les paramètres de base:")
-        logger.info(f"[DEBUG IA]   - Modèle: runware:106@1")
-        logger.info(f"[DEBUG IA]   - Dimensions: 1392x752")
-        logger.info(f"[DEBUG IA]   - Étapes: {config.get('effect_steps', 5)}")
-        logger.info(f"[DEBUG IA]   - CFG Scale: 2.5")
-        logger.info(f"[DEBUG IA]   - Nombre de résultats: 1")
-        
-        # Appliquer l'effet
-        logger.info("[DEBUG IA] Envoi de la requête à l'API Runware...")
-        # La méthode correcte est imageInference
-        images = await runware.imageInference(requestImage=request)
-        logger.info(f"[DEBUG IA] Réponse reçue: {len(images) if images else 0} image(s) générée(s)")
+        images = None
+        for attempt in (1, 2):
+            # Récupérer le client Runware partagé
+            runware = await _get_runware_client(runtime_config.runware_api_key)
+            try:
+                # Téléverser l'image source (ou l'encoder en base64 à défaut)
+                logger.debug("[DEBUG IA] Préparation de l'image de référence...")
+                reference_image = await _prepare_reference_image(runware, photo_path)
+                logger.debug("[DEBUG IA] Image de référence prête (%d caractères)", len(reference_image))
+                
+                # Préparer la requête d'inférence avec referenceImages (requis pour ce modèle)
+                logger.debug("[DEBUG IA] Préparation de la requête d'inférence avec referenceImages...")
+                request = IImageInference(
+                    positivePrompt=runtime_config.effect_prompt,
+                    referenceImages=[reference_image],
+                    model="runware:106@1",
+                    height=752, 
+                    width=1392,  
+                    steps=runtime_config.effect_steps,
+                    CFGScale=2.5,
+                    numberResults=1
+                )
+                logger.debug(
+                    "[DEBUG IA] Requête préparée: modèle=runware:106@1, dimensions=1392x752, "
+                    "étapes=%s, CFG Scale=2.5, résultats=1",
+                    runtime_config.effect_steps,
+                )
+                
+                # Appliquer l'effet
+                logger.debug("[DEBUG IA] Envoi de la requête à l'API Runware...")
+                # La méthode correcte est imageInference
+                images = await runware.imageInference(requestImage=request)
+                break
+            except (ConnectionClosed, ConnectionError) as exc:
+                # Connexion partagée fermée côté serveur : reconnecter une fois
+                await _drop_runware_client(runware)
+                if attempt == 2:
+                    raise
+                logger.info("[DEBUG IA] Connexion Runware fermée (%s), reconnexion...", exc)
+        logger.debug("[DEBUG IA] Réponse reçue: %d image(s) générée(s)", len(images) if images else 0)
         
         if images and len(images) > 0:
             # Télécharger l'image transformée
-            logger.info(f"[DEBUG IA] URL de l'image générée: {images[0].imageURL}")
-            logger.info("[DEBUG IA] Téléchargement de l'image transformée...")
-            import requests
-            response = requests.get(images[0].imageURL)
-            logger.info(f"[DEBUG IA] Statut de téléchargement: {response.status_code}")
+            logger.debug("[DEBUG IA] URL de l'image générée: %s", images[0].imageURL)
+            logger.debug("[DEBUG IA] Téléchargement de l'image transformée...")
+            session = await _get_http_session()
+            async with session.get(images[0].imageURL) as response:
+                status_code = response.status
+                image_bytes = await response.read() if status_code == 200 else None
+            logger.debug("[DEBUG IA] Statut de téléchargement: %s", status_code)
             
-            if response.status_code == 200:
-                logger.info(f"[DEBUG IA] Taille de l'image téléchargée: {len(response.content)} bytes")
+            if image_bytes is not None:
+                logger.debug("[DEBUG IA] Taille de l'image téléchargée: %d bytes", len(image_bytes))
                 
                 # S'assurer que le dossier effet existe
-                logger.info(f"[DEBUG IA] Vérification du dossier effet: {EFFECT_FOLDER}")
                 os.makedirs(EFFECT_FOLDER, exist_ok=True)
-                logger.info(f"[DEBUG IA] Dossier effet existe: {os.path.exists(EFFECT_FOLDER)}")
                 
                 # Créer un nouveau nom de fichier pour l'image avec effet
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                effect_filename = f'effect_{timestamp}.jpg'
+                effect_filename = f'effect_{_photo_timestamp()}.jpg'
                 effect_path = os.path.join(EFFECT_FOLDER, effect_filename)
-                logger.info(f"[DEBUG IA] Sauvegarde vers: {effect_path}")
+                logger.debug("[DEBUG IA] Sauvegarde vers: %s", effect_path)
                 
                 # Sauvegarder l'image avec effet
                 with open(effect_path, 'wb') as f:
-                    f.write(response.content)
-                logger.info("[DEBUG IA] Image sauvegardée avec succès")
+                    f.write(image_bytes)
+                logger.debug("[DEBUG IA] Image sauvegardée avec succès")
                 
                 # Mettre à jour la photo actuelle
-                current_photo = effect_filename
-                logger.info(f"[DEBUG IA] Photo actuelle mise à jour: {current_photo}")
+                current_photo = CurrentPhoto(EFFECT_FOLDER, effect_filename)
+                logger.debug("[DEBUG IA] Photo actuelle mise à jour: %s", current_photo.filename)
                 logger.info("[DEBUG IA] Effet appliqué avec succès!")
                 
                 # Envoyer sur Telegram si activé
-                send_type = config.get('telegram_send_type', 'photos')
+                send_type = runtime_config.telegram_send_type
                 if send_type in ['effet', 'both']:
-                    threading.Thread(target=send_to_telegram, args=(effect_path, config, "effet")).start()
+                    _telegram_pool.submit(send_to_telegram, effect_path, config, "effet")
                 
-                return jsonify({
+                return {
                     'success': True, 
                     'message': 'Effet appliqué avec succès!',
                     'new_filename': effect_filename
-                })
+                }
             else:
-                logger.info(f"[DEBUG IA] ERREUR: Échec du téléchargement (code {response.status_code})")
-                return jsonify({'success': False, 'error': 'Erreur lors du téléchargement de l\'image transformée'})
+                logger.info("[DEBUG IA] ERREUR: Échec du téléchargement (code %s)", status_code)
+                return {'success': False, 'error': 'Erreur lors du téléchargement de l\'image transformée'}
         else:
             logger.info("[DEBUG IA] ERREUR: Aucune image générée par l'IA")
-            return jsonify({'success': False, 'error': 'Aucune image générée par l\'IA'})
+            return {'success': False, 'error': 'Aucune image générée par l\'IA'}
             
     except Exception as e:
         logger.info(f"Erreur lors de l'application de l'effet: {e}")
-        return jsonify({'success': False, 'error': f'Erreur IA: {str(e)}'})
+        return {'success': False, 'error': f'Erreur IA: {str(e)}'}
+
+@app.template_filter('fmtdate')
+def format_timestamp(timestamp):
+    """Filtre Jinja : horodatage Unix vers 'jj/mm/aaaa hh:mm'"""
+    return time.strftime('%d/%m/%Y %H:%M', time.localtime(timestamp))
+
+
+_PHOTO_EXTS = frozenset({'.png', '.jpg', '.jpeg'})
+
+
+def _is_photo(name):
+    """Vrai si le nom de fichier porte une extension d'image (sans copier tout le nom)"""
+    i = name.rfind('.')
+    return i >= 0 and name[i:].lower() in _PHOTO_EXTS
+
+
+def _scan_photo_folder(folder, type_label):
+    """Liste les images d'un dossier avec une seule lecture de métadonnées par fichier"""
+    photos = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not _is_photo(entry.name):
+                    continue
+                st = entry.stat()
+                photos.append({
+                    'filename': entry.name,
+                    'size_kb': st.st_size / 1024,  # Taille en KB
+                    'mtime': st.st_mtime,  # Formaté à l'affichage (filtre fmtdate)
+                    'type': type_label,
+                    'folder': folder
+                })
+    except FileNotFoundError:
+        pass
+    photos.sort(key=itemgetter('mtime'), reverse=True)
+    return photos
+
+
+_LISTING_TTL_SECONDS = 2.0
+_listing_cache = {}
+_listing_cache_lock = threading.Lock()
+
+
+def get_listing(folder, type_label, ttl=_LISTING_TTL_SECONDS):
+    """Listing d'un dossier photo (plus récentes en premier), mis en cache.
+
+    Le cache est invalidé dès que le mtime du dossier change (ajout ou
+    suppression de fichier) ou après ``ttl`` secondes. La liste renvoyée est
+    partagée : ne pas la modifier.
+    """
+    try:
+        dir_mtime = os.stat(folder).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    now = time.monotonic()
+    with _listing_cache_lock:
+        cached = _listing_cache.get(folder)
+        if cached is not None and cached[0] == dir_mtime and now - cached[1] < ttl:
+            return cached[2]
+
+    entries = _scan_photo_folder(folder, type_label)
+    with _listing_cache_lock:
+        _listing_cache[folder] = (dir_mtime, now, entries)
+    return entries
+
+
+_DEVICE_CACHE_TTL_SECONDS = 5.0
+_camera_cache = {'ts': 0.0, 'cameras': None}
+_camera_cache_lock = threading.Lock()
+
+
+def _cached_cameras(force=False):
+    """Retourne les caméras USB détectées, sondées au plus toutes les 5 secondes"""
+    with _camera_cache_lock:
+        now = time.monotonic()
+        cameras = _camera_cache['cameras']
+        if force or cameras is None or now - _camera_cache['ts'] >= _DEVICE_CACHE_TTL_SECONDS:
+            cameras = detect_cameras(refresh=force)
+            _camera_cache.update(ts=now, cameras=cameras)
+        return cameras
+
+
+def _send_photo(filename, **kwargs):
+    """Envoie une photo du dossier photos, sinon du dossier effet.
+
+    send_from_directory vérifie déjà l'existence du fichier : on essaie
+    directement chaque dossier et NotFound remonte si aucun ne convient.
+    """
+    try:
+        return send_from_directory(PHOTOS_FOLDER, filename, **kwargs)
+    except NotFound:
+        return send_from_directory(EFFECT_FOLDER, filename, **kwargs)
+
 
 @app.route('/admin')
 def admin():
@@ -897,49 +1333,19 @@ def admin():
         os.makedirs(EFFECT_FOLDER)
     
     # Récupérer la liste des photos avec leurs métadonnées
-    photos = []
+    photos = list(get_listing(PHOTOS_FOLDER, 'photo'))
+    effects = get_listing(EFFECT_FOLDER, 'effet')
     
-    # Récupérer les photos du dossier PHOTOS_FOLDER
-    if os.path.exists(PHOTOS_FOLDER):
-        for filename in os.listdir(PHOTOS_FOLDER):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                file_path = os.path.join(PHOTOS_FOLDER, filename)
-                file_size_kb = os.path.getsize(file_path) / 1024  # Taille en KB
-                file_date = datetime.fromtimestamp(os.path.getmtime(file_path))
-                
-                photos.append({
-                    'filename': filename,
-                    'size_kb': file_size_kb,
-                    'date': file_date.strftime("%d/%m/%Y %H:%M"),
-                    'type': 'photo',
-                    'folder': PHOTOS_FOLDER
-                })
-    
-    # Récupérer les photos du dossier EFFECT_FOLDER
-    if os.path.exists(EFFECT_FOLDER):
-        for filename in os.listdir(EFFECT_FOLDER):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                file_path = os.path.join(EFFECT_FOLDER, filename)
-                file_size_kb = os.path.getsize(file_path) / 1024  # Taille en KB
-                file_date = datetime.fromtimestamp(os.path.getmtime(file_path))
-                
-                photos.append({
-                    'filename': filename,
-                    'size_kb': file_size_kb,
-                    'date': file_date.strftime("%d/%m/%Y %H:%M"),
-                    'type': 'effet',
-                    'folder': EFFECT_FOLDER
-                })
+    # Compter les photos de chaque type (un dossier par type)
+    photo_count = len(photos)
+    effect_count = len(effects)
+    photos.extend(effects)
     
     # Trier les photos par date (plus récentes en premier)
-    photos.sort(key=lambda x: datetime.strptime(x['date'], "%d/%m/%Y %H:%M"), reverse=True)
-    
-    # Compter les photos de chaque type
-    photo_count = sum(1 for p in photos if p['type'] == 'photo')
-    effect_count = sum(1 for p in photos if p['type'] == 'effet')
+    photos.sort(key=itemgetter('mtime'), reverse=True)
     
-    # Détecter les caméras USB disponibles
-    available_cameras = detect_cameras()
+    # Caméras USB disponibles (détection mise en cache quelques secondes)
+    available_cameras = _cached_cameras()
     
     # Détecter les ports série disponibles
     available_serial_ports = detect_serial_ports()
@@ -956,6 +1362,17 @@ def admin():
                            available_serial_ports=available_serial_ports,
                            show_toast=request.args.get('show_toast', False))
 
+@app.route('/admin/rescan_devices', methods=['POST'])
+def rescan_devices():
+    """Relance la détection des caméras USB et des ports série"""
+    cameras = _cached_cameras(force=True)
+    serial_ports = detect_serial_ports(force=True)
+    return jsonify({
+        'success': True,
+        'cameras': [{'id': camera_id, 'name': name} for camera_id, name in cameras],
+        'serial_ports': [{'value': value, 'label': label} for value, label in serial_ports]
+    })
+
 @app.route('/admin/save', methods=['POST'])
 def save_admin_config():
     """Sauvegarder la configuration admin"""
@@ -1014,7 +1431,8 @@ def save_admin_config():
         except ValueError:
             config['print_resolution'] = 384
         
-        save_config(config)
+        # Attendre l'écriture : une carte SD pleine ou en lecture seule doit être signalée
+        save_config(config).result()
         flash('Configuration sauvegardée avec succès!', 'success')
         
     except Exception as e:
@@ -1022,25 +1440,25 @@ def save_admin_config():
     
     return redirect(url_for('admin'))
 
+def _delete_photos_in(folder):
+    """Supprime les images d'un dossier et retourne le nombre de fichiers supprimés"""
+    deleted_count = 0
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and _is_photo(entry.name):
+                    os.unlink(entry.path)
+                    deleted_count += 1
+    except FileNotFoundError:
+        pass
+    return deleted_count
+
 @app.route('/admin/delete_photos', methods=['POST'])
 def delete_all_photos():
     """Supprimer toutes les photos (normales et avec effet)"""
     try:
-        deleted_count = 0
-        
-        # Supprimer les photos normales
-        if os.path.exists(PHOTOS_FOLDER):
-            for filename in os.listdir(PHOTOS_FOLDER):
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    os.remove(os.path.join(PHOTOS_FOLDER, filename))
-                    deleted_count += 1
-        
-        # Supprimer les photos avec effet
-        if os.path.exists(EFFECT_FOLDER):
-            for filename in os.listdir(EFFECT_FOLDER):
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    os.remove(os.path.join(EFFECT_FOLDER, filename))
-                    deleted_count += 1
+        # Supprimer les photos normales puis les photos avec effet
+        deleted_count = _delete_photos_in(PHOTOS_FOLDER) + _delete_photos_in(EFFECT_FOLDER)
         
         flash(f'{deleted_count} photo(s) supprimée(s) avec succès!', 'success')
     except Exception as e:
@@ -1053,13 +1471,10 @@ def download_photo(filename):
     """Télécharger une photo spécifique"""
     try:
         # Chercher la photo dans les deux dossiers
-        if os.path.exists(os.path.join(PHOTOS_FOLDER, filename)):
-            return send_from_directory(PHOTOS_FOLDER, filename, as_attachment=True)
-        elif os.path.exists(os.path.join(EFFECT_FOLDER, filename)):
-            return send_from_directory(EFFECT_FOLDER, filename, as_attachment=True)
-        else:
-            flash('Photo introuvable', 'error')
-            return redirect(url_for('admin'))
+        return _send_photo(filename, as_attachment=True)
+    except NotFound:
+        flash('Photo introuvable', 'error')
+        return redirect(url_for('admin'))
     except Exception as e:
         flash(f'Erreur lors du téléchargement: {str(e)}', 'error')
         return redirect(url_for('admin'))
@@ -1070,45 +1485,36 @@ def save_photo(filename):
     try:
         # Chercher la photo dans les deux dossiers
         photo_path = None
-        if os.path.exists(os.path.join(PHOTOS_FOLDER, filename)):
-            photo_path = os.path.join(PHOTOS_FOLDER, filename)
-        elif os.path.exists(os.path.join(EFFECT_FOLDER, filename)):
-            photo_path = os.path.join(EFFECT_FOLDER, filename)
+        for folder in (PHOTOS_FOLDER, EFFECT_FOLDER):
+            candidate = os.path.join(folder, filename)
+            if os.path.isfile(candidate):
+                photo_path = candidate
+                break
         
         if photo_path:
             # Vérifier si le script d'impression existe
-            script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ScriptPythonPOS.py')
-            if not os.path.exists(script_path):
+            if not os.path.isfile(SCRIPT_PATH):
                 flash('Script d\'impression introuvable (ScriptPythonPOS.py)', 'error')
                 return redirect(url_for('admin'))
             
-            # Utiliser le script d'impression existant
-            import subprocess
-            cmd = [
-                'python3', 'ScriptPythonPOS.py',
-                '--image', photo_path
-            ]
-            
-            # Ajouter le texte de pied de page si défini
-            footer_text = config.get('footer_text', '')
-            if footer_text:
-                cmd.extend(['--text', footer_text])
+            # Utiliser le script d'impression existant, chargé dans le processus
+            try:
+                from ScriptPythonPOS import run as print_with_script
+            except ImportError as exc:
+                if 'escpos' in str(exc):
+                    flash('Module escpos manquant. Installez-le avec: pip install python-escpos', 'error')
+                else:
+                    flash(f'Erreur lors de la sauvegarde: {exc}', 'error')
+                return redirect(url_for('admin'))
             
-            # Ajouter l'option HD si la résolution est élevée
+            # Texte de pied de page et option HD si la résolution est élevée
+            footer_text = config.get('footer_text', '') or None
             print_resolution = config.get('print_resolution', 384)
-            if print_resolution > 384:
-                cmd.append('--hd')
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
             
-            if result.returncode == 0:
+            if print_with_script(photo_path, text=footer_text, hd=print_resolution > 384):
                 flash('Photo sauvegardée avec succès!', 'success')
             else:
-                error_msg = result.stderr.strip() if result.stderr else 'Erreur inconnue'
-                if 'ModuleNotFoundError' in error_msg and 'escpos' in error_msg:
-                    flash('Module escpos manquant. Installez-le avec: pip install python-escpos', 'error')
-                else:
-                    flash(f'Erreur lors de la sauvegarde: {error_msg}', 'error')
+                flash('Erreur lors de la sauvegarde: plus de papier dans l\'imprimante', 'error')
         else:
             flash('Photo introuvable', 'error')
     except Exception as e:
@@ -1119,17 +1525,14 @@ def save_photo(filename):
 @app.route('/api/slideshow')
 def get_slideshow_data():
     """API pour récupérer les données du diaporama"""
-    photos = []
-    
     # Déterminer le dossier source selon la configuration
-    source_folder = EFFECT_FOLDER if config.get('slideshow_source', 'photos') == 'effet' else PHOTOS_FOLDER
-    
-    if os.path.exists(source_folder):
-        for filename in os.listdir(source_folder):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                photos.append(filename)
+    if config.get('slideshow_source', 'photos') == 'effet':
+        source_folder, type_label = EFFECT_FOLDER, 'effet'
+    else:
+        source_folder, type_label = PHOTOS_FOLDER, 'photo'
     
-    photos.sort(reverse=True)  # Plus récentes en premier
+    # Le listing partagé est déjà trié par date (plus récentes en premier)
+    photos = [entry['filename'] for entry in get_listing(source_folder, type_label)]
     
     return jsonify({
         'enabled': config.get('slideshow_enabled', False),
@@ -1138,6 +1541,17 @@ def get_slideshow_data():
         'photos': photos
     })
 
+@app.route('/api/camera_status')
+def get_camera_status():
+    """API pour vérifier l'état de la caméra USB (reconnexion en cours ou non)"""
+    camera = usb_camera
+    return jsonify({
+        'camera_type': config.get('camera_type', 'picamera'),
+        'running': bool(camera and camera.is_running),
+        'degraded': bool(camera and camera.degraded),
+        'error': camera.error if camera else None,
+    })
+
 @app.route('/api/printer_status')
 def get_printer_status():
     """API pour vérifier l'état de l'imprimante"""
@@ -1146,14 +1560,19 @@ def get_printer_status():
 @app.route('/photos/<filename>')
 def serve_photo(filename):
     """Servir les photos"""
-    # Vérifier d'abord dans le dossier photos
-    if os.path.exists(os.path.join(PHOTOS_FOLDER, filename)):
-        return send_from_directory(PHOTOS_FOLDER, filename)
-    # Sinon vérifier dans le dossier effet
-    elif os.path.exists(os.path.join(EFFECT_FOLDER, filename)):
-        return send_from_directory(EFFECT_FOLDER, filename)
-    else:
-        abort(404)
+    wait_for_photo_write(filename)
+    # Noms horodatés, jamais réécrits : le navigateur peut garder la photo
+    # en cache et revalider par ETag/Last-Modified (304)
+    return _send_photo(filename, conditional=True, max_age=3600)
+
+_MJPEG_PART_PREFIX = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+_MJPEG_READ_SIZE = 64 * 1024
+
+
+def _mjpeg_part(frame: bytes) -> bytes:
+    """Assemble une partie du flux multipart MJPEG en une seule copie."""
+    return b''.join((_MJPEG_PART_PREFIX, b'%d\r\n\r\n' % len(frame), frame, b'\r\n'))
+
 
 @app.route('/video_stream')
 def video_stream():
@@ -1174,23 +1593,22 @@ def generate_video_stream():
         logger.info("[CAMERA] Démarrage de la caméra USB...")
 
         camera_id = config.get('usb_camera_id', 0)
-        usb_camera = UsbCamera(camera_id=camera_id)
+        # Les captures reprennent la dernière frame : elle est encodée à la qualité de capture
+        usb_camera = UsbCamera(camera_id=camera_id, jpeg_quality=config.get('capture_jpeg_quality', 92))
         if not usb_camera.start():
             error_msg = usb_camera.error or f"Impossible de démarrer la caméra USB avec ID {camera_id}"
             raise RuntimeError(error_msg)
 
         while True:
-            frame = usb_camera.get_frame()
+            # Réveillé par la caméra dès qu'une nouvelle frame est publiée
+            frame = usb_camera.get_frame(wait=True)
+            if not usb_camera.is_running:
+                # Budget de reconnexion épuisé : passer au mode caméra suivant
+                raise RuntimeError(usb_camera.error or f"Caméra USB {camera_id} perdue")
             if frame:
-                with frame_lock:
-                    last_frame = frame
+                last_frame = frame
 
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n'
-                       b'Content-Length: ' + str(len(frame)).encode() + b'\r\n\r\n' +
-                       frame + b'\r\n')
-            else:
-                time.sleep(0.03)
+                yield _mjpeg_part(frame)
 
     def stream_picamera():
         """Démarrer et diffuser un flux via Picamera2 ou libcamera-vid."""
@@ -1204,24 +1622,23 @@ def generate_video_stream():
         if PICAMERA2_AVAILABLE:
             try:
                 logger.info("[CAMERA] Utilisation de Picamera2 pour le flux vidéo")
-                picamera_stream = PiCameraStream(resolution=(1280, 720), framerate=15)
+                picamera_stream = PiCameraStream(
+                    resolution=(1280, 720),
+                    framerate=15,
+                    jpeg_quality=config.get('capture_jpeg_quality', 92),
+                )
                 if not picamera_stream.start():
                     error_reason = picamera_stream.error or "Initialisation Picamera2 inconnue"
                     raise RuntimeError(error_reason)
 
                 while True:
-                    frame = picamera_stream.get_frame()
+                    frame = picamera_stream.get_frame(wait=True)
                     if not frame:
-                        time.sleep(0.02)
                         continue
 
-                    with frame_lock:
-                        last_frame = frame
+                    last_frame = frame
 
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n'
-                           b'Content-Length: ' + str(len(frame)).encode() + b'\r\n\r\n' +
-                           frame + b'\r\n')
+                    yield _mjpeg_part(frame)
             except Exception as err:
                 picamera_errors.append(str(err))
                 logger.info(f"[CAMERA] Picamera2 indisponible: {err}")
@@ -1258,15 +1675,19 @@ def generate_video_stream():
                 missing += f" | Picamera2: {'; '.join(picamera_errors)}"
             raise FileNotFoundError(missing) from err
 
-        buffer = b''
+        buffer = bytearray()
+        # Tampon de lecture préalloué, réutilisé à chaque lecture du pipe
+        chunk_buffer = bytearray(_MJPEG_READ_SIZE)
+        chunk_view = memoryview(chunk_buffer)
 
         while camera_process and camera_process.poll() is None:
             try:
-                chunk = camera_process.stdout.read(1024)
-                if not chunk:
+                # Lectures de 64 Kio : une frame 720p tient en une ou deux lectures
+                read = camera_process.stdout.readinto(chunk_buffer)
+                if not read:
                     break
 
-                buffer += chunk
+                buffer.extend(chunk_view[:read])
 
                 while True:
                     start = buffer.find(b'\xff\xd8')
@@ -1277,16 +1698,12 @@ def generate_video_stream():
                     if end == -1:
                         break
 
-                    jpeg_frame = buffer[start:end + 2]
-                    buffer = buffer[end + 2:]
+                    jpeg_frame = bytes(buffer[start:end + 2])
+                    del buffer[:end + 2]
 
-                    with frame_lock:
-                        last_frame = jpeg_frame
+                    last_frame = jpeg_frame
 
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n'
-                           b'Content-Length: ' + str(len(jpeg_frame)).encode() + b'\r\n\r\n' +
-                           jpeg_frame + b'\r\n')
+                    yield _mjpeg_part(jpeg_frame)
 
             except Exception as e:
                 logger.info(f"[CAMERA] Erreur lecture flux: {e}")
@@ -1413,6 +1830,13 @@ def stop_camera():
 def cleanup():
     logger.info("[APP] Arrêt de l'application, nettoyage des ressources...")
     stop_camera_process()
+    _write_pool.shutdown(wait=True)
+    _telegram_pool.shutdown(wait=False)
+    if _async_loop is not None and _http_session is not None and not _http_session.closed:
+        try:
+            asyncio.run_coroutine_threadsafe(_http_session.close(), _async_loop).result(timeout=2)
+        except Exception as e:
+            logger.info(f"[APP] Erreur lors de la fermeture de la session HTTP: {e}")
 
 def signal_handler(sig, frame):
     stop_camera_process()
@@ -3,11 +3,13 @@
 
 from __future__ import annotations
 
+import atexit
 import io
 import logging
 import threading
 from contextlib import contextmanager
 from datetime import datetime
+from typing import Optional
 
 from flask import Flask, Response, jsonify
 from flask_cors import CORS
@@ -20,6 +22,20 @@ except Exception as exc:  # pragma: no cover - dependency missing on CI
 else:
     PICAMERA_IMPORT_ERROR = None
 
+try:
+    from turbojpeg import TJPF_BGR, TJPF_RGB, TurboJPEG
+
+    _TURBOJPEG = TurboJPEG()
+except Exception:  # pragma: no cover - optional SIMD encoder
+    _TURBOJPEG = None
+    _TURBOJPEG_PIXEL_FORMATS = {}
+else:
+    # Picamera2 names formats after the little-endian word layout: an array
+    # captured as "BGR888" holds R, G, B bytes per pixel.
+    _TURBOJPEG_PIXEL_FORMATS = {"BGR888": TJPF_RGB, "RGB888": TJPF_BGR}
+
+_JPEG_QUALITY = 85
+
 LOGGER = logging.getLogger("camera_service")
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
@@ -27,14 +43,85 @@ app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "http://localhost:5000"}})
 
 _CAMERA_LOCK = threading.Lock()
+# La caméra reste démarrée entre deux captures, puis est libérée après une
+# période d'inactivité pour que le flux principal puisse la reprendre.
+_CAMERA_IDLE_SECONDS = 30.0
+_camera_singleton: Optional["Picamera2"] = None
+_idle_timer: Optional[threading.Timer] = None
 
 
 class CameraUnavailableError(RuntimeError):
     """Raised when the camera cannot be acquired."""
 
 
+def _close_camera(camera: Picamera2) -> None:
+    try:
+        camera.stop()
+    except Exception:  # pragma: no cover - best effort cleanup
+        LOGGER.exception("Erreur lors de l'arrêt de la caméra")
+    try:
+        camera.close()
+    except Exception:  # pragma: no cover
+        LOGGER.exception("Erreur lors de la fermeture de la caméra")
+
+
+def _start_camera() -> Picamera2:
+    camera = Picamera2()
+    try:
+        still_config = camera.create_still_configuration()
+        camera.configure(still_config)
+        camera.start()
+    except Exception:
+        _close_camera(camera)
+        raise
+    return camera
+
+
+def _release_camera() -> None:
+    """Stop the shared camera; the caller must hold ``_CAMERA_LOCK``."""
+    global _camera_singleton
+
+    camera, _camera_singleton = _camera_singleton, None
+    if camera is not None:
+        _close_camera(camera)
+
+
+def _release_if_idle() -> None:
+    if not _CAMERA_LOCK.acquire(timeout=4):
+        return
+    try:
+        LOGGER.info("Caméra inactive depuis %.0fs, libération", _CAMERA_IDLE_SECONDS)
+        _release_camera()
+    finally:
+        _CAMERA_LOCK.release()
+
+
+def _schedule_idle_release() -> None:
+    global _idle_timer
+
+    if _idle_timer is not None:
+        _idle_timer.cancel()
+    _idle_timer = threading.Timer(_CAMERA_IDLE_SECONDS, _release_if_idle)
+    _idle_timer.daemon = True
+    _idle_timer.start()
+
+
+@atexit.register
+def _shutdown_camera() -> None:
+    if _idle_timer is not None:
+        _idle_timer.cancel()
+    if _CAMERA_LOCK.acquire(timeout=4):
+        try:
+            _release_camera()
+        finally:
+            _CAMERA_LOCK.release()
+
+
 @contextmanager
 def open_camera() -> Picamera2:
+    """Yield the shared, already started camera under the camera lock."""
+    global _camera_singleton
+
     if Picamera2 is None:
         raise CameraUnavailableError(
             "Picamera2 non disponible: installez python3-picamera2 et vérifiez les permissions"
@@ -43,28 +130,28 @@ def open_camera() -> Picamera2:
     if not _CAMERA_LOCK.acquire(timeout=4):
         raise CameraUnavailableError("Caméra occupée par un autre processus")
 
-    camera = None
     try:
-        camera = Picamera2()
-        still_config = camera.create_still_configuration()
-        camera.configure(still_config)
-        camera.start()
-        yield camera
+        if _camera_singleton is None:
+            _camera_singleton = _start_camera()
+        try:
+            yield _camera_singleton
+        except Exception:
+            # État inconnu après une erreur : repartir d'une caméra neuve
+            _release_camera()
+            raise
     finally:
-        if camera is not None:
-            try:
-                camera.stop()
-            except Exception:  # pragma: no cover - best effort cleanup
-                LOGGER.exception("Erreur lors de l'arrêt de la caméra")
-            try:
-                camera.close()
-            except Exception:  # pragma: no cover
-                LOGGER.exception("Erreur lors de la fermeture de la caméra")
+        if _camera_singleton is not None:
+            _schedule_idle_release()
         _CAMERA_LOCK.release()
 
 
 def capture_jpeg_bytes() -> bytes:
     with open_camera() as camera:
+        if _TURBOJPEG is not None:
+            pixel_format = _TURBOJPEG_PIXEL_FORMATS.get(camera.camera_config["main"]["format"])
+            if pixel_format is not None:
+                frame = camera.capture_array("main")
+                return _TURBOJPEG.encode(frame, quality=_JPEG_QUALITY, pixel_format=pixel_format)
         buffer = io.BytesIO()
         camera.capture_file(buffer, format="jpeg")
         return buffer.getvalue()
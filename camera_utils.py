@@ -1,110 +1,396 @@
+import importlib.util
+import json
 import logging
+import glob
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache
+from pathlib import Path
 
-import cv2
+# cv2 et Picamera2 (toute la pile libcamera) ne sont importés qu'à la première
+# utilisation d'une caméra : importer ce module reste léger
+PICAMERA2_AVAILABLE = importlib.util.find_spec("picamera2") is not None
 
-try:
-    from picamera2 import Picamera2
+logger = logging.getLogger(__name__)
 
-    PICAMERA2_AVAILABLE = True
-except ImportError:  # pragma: no cover - dépend d'un environnement Raspberry Pi
-    Picamera2 = None  # type: ignore
-    PICAMERA2_AVAILABLE = False
+# Équivalent de cv2.VideoWriter_fourcc(*"MJPG"), sans importer cv2
+_MJPG_FOURCC = int.from_bytes(b"MJPG", "little")
 
-logger = logging.getLogger(__name__)
 
+def _raw_jpeg(frame):
+    """Retourne les octets JPEG si ``frame`` est le buffer MJPEG brut du pilote."""
+    if frame is None or frame.ndim == 3:
+        return None
+    data = frame.reshape(-1)
+    if data[:2].tobytes() != b"\xff\xd8":
+        return None
+    return data.tobytes()
 
-def detect_cameras():
-    """Detect available USB cameras."""
-    available_cameras = []
-    logger.info("[CAMERA] Début de la détection des caméras USB...")
 
-    for i in range(10):
+def _jpeg_view(jpeg):
+    """Vue sur le buffer renvoyé par ``cv2.imencode`` : aucune copie des octets."""
+    return memoryview(jpeg.reshape(-1))
+
+
+_BUFFERED_GRAB_SECONDS = 0.005
+_MAX_DRAIN_GRABS = 5
+
+
+def _grab_latest(capture):
+    """Avance jusqu'à la frame la plus récente sans décoder les frames en retard.
+
+    Un ``grab()`` qui rend la main en moins de 5 ms lisait une frame déjà en
+    tampon : on continue jusqu'à une frame fraîche (bornée à quelques appels).
+    """
+    for _ in range(_MAX_DRAIN_GRABS):
+        start = time.monotonic()
+        if not capture.grab():
+            return False
+        if time.monotonic() - start > _BUFFERED_GRAB_SECONDS:
+            break
+    return True
+
+
+def _enable_mjpeg_passthrough(capture):
+    """Désactive le décodage OpenCV pour récupérer le JPEG natif de la webcam.
+
+    Ne fonctionne qu'avec un flux MJPG (V4L2) : ``read()`` renvoie alors le
+    buffer encodé au lieu d'une image BGR. Retourne False (et rétablit la
+    conversion) si le pilote ne le permet pas.
+    """
+    import cv2
+
+    if int(capture.get(cv2.CAP_PROP_FOURCC)) != _MJPG_FOURCC:
+        return False
+    if not capture.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+        return False
+    ret, frame = capture.read()
+    if ret and _raw_jpeg(frame) is not None:
+        return True
+    capture.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    return False
+
+
+_DETECT_MAX_INDEX = 10
+_DETECT_WORKERS = 4
+_DETECT_TIMEOUT_SECONDS = 10.0
+_DETECT_TARGET_RESOLUTION = (1920, 1080)
+_CAMERA_CACHE_PATH = Path.home() / ".cache" / "simplebooth" / "cameras.json"
+# Le cache disque ne sert qu'au premier appel : ensuite, on resonde les périphériques
+_camera_cache_consulted = False
+
+
+def _load_camera_cache():
+    try:
+        with open(_CAMERA_CACHE_PATH, "r", encoding="utf-8") as fh:
+            return [(int(camera_id), str(name)) for camera_id, name in json.load(fh)]
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _store_camera_cache(cameras):
+    try:
+        _CAMERA_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _CAMERA_CACHE_PATH.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(cameras, fh)
+        os.replace(tmp_path, _CAMERA_CACHE_PATH)
+    except OSError as err:
+        logger.info(f"[CAMERA] Impossible d'enregistrer le cache des caméras: {err}")
+
+
+@lru_cache(maxsize=1)
+def _backend_names():
+    """OpenCV backends to try, in order, with their display names."""
+    import cv2
+
+    return {
+        cv2.CAP_ANY: "Auto",
+        cv2.CAP_DSHOW: "DirectShow",
+        cv2.CAP_V4L2: "V4L2",
+        cv2.CAP_GSTREAMER: "GStreamer",
+    }
+
+
+_V4L2_FORMAT_RE = re.compile(r"\[\d+\]: '(\w+)'")
+_V4L2_SIZE_RE = re.compile(r"Size: Discrete (\d+)x(\d+)")
+
+
+@lru_cache(maxsize=1)
+def _v4l2_ctl_path():
+    if not sys.platform.startswith("linux"):
+        return None
+    return shutil.which("v4l2-ctl")
+
+
+def _enumerate_v4l2_modes(device_index):
+    """List the discrete ``(width, height, fourcc)`` modes of ``/dev/video<index>``.
+
+    Returns ``[]`` when the device node does not exist. Returns None when the
+    modes are unknown (not Linux, v4l2-ctl missing or failing, or only
+    Stepwise/Continuous sizes reported), in which case callers fall back
+    to probing.
+    """
+    v4l2_ctl = _v4l2_ctl_path()
+    if v4l2_ctl is None:
+        return None
+    device = f"/dev/video{device_index}"
+    if not os.path.exists(device):
+        return []
+    try:
+        result = subprocess.run(
+            [v4l2_ctl, "-d", device, "--list-formats-ext"],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+
+    modes = []
+    fourcc = None
+    for line in result.stdout.splitlines():
+        format_match = _V4L2_FORMAT_RE.search(line)
+        if format_match:
+            fourcc = format_match.group(1)
+            continue
+        size_match = _V4L2_SIZE_RE.search(line)
+        if size_match and fourcc:
+            modes.append((int(size_match.group(1)), int(size_match.group(2)), fourcc))
+    # Tailles Stepwise/Continuous seulement (bcm2835-v4l2, certaines UVC) : inconnu
+    return modes or None
+
+
+# Cadence constante : l'auto-exposition ne doit pas allonger le temps de pose
+# (nom du contrôle selon la version du noyau), anti-scintillement 50 Hz.
+_V4L2_TUNING_CONTROLS = (
+    "exposure_auto_priority=0",
+    "exposure_dynamic_framerate=0",
+    "power_line_frequency=1",
+)
+
+
+def _apply_driver_tuning(device_index):
+    """Apply V4L2 controls favouring a steady frame rate; best effort."""
+    v4l2_ctl = _v4l2_ctl_path()
+    if v4l2_ctl is None:
+        return
+    device = f"/dev/video{device_index}"
+    applied = []
+    for control in _V4L2_TUNING_CONTROLS:
+        # Un contrôle absent ferait échouer tout l'appel : un par un
         try:
-            logger.info(f"[CAMERA] Test de la caméra ID {i}...")
-            backends = [cv2.CAP_ANY, cv2.CAP_DSHOW, cv2.CAP_V4L2, cv2.CAP_GSTREAMER]
-            cap = None
-            for backend in backends:
-                try:
-                    cap = cv2.VideoCapture(i, backend)
-                    if cap.isOpened():
-                        resolutions_to_test = [
-                            (1920, 1080),
-                            (1280, 720),
-                            (640, 480)
-                        ]
-                        best_resolution = None
-                        best_fps = 0
-                        for test_width, test_height in resolutions_to_test:
-                            cap.set(cv2.CAP_PROP_FRAME_WIDTH, test_width)
-                            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, test_height)
-                            cap.set(cv2.CAP_PROP_FPS, 30)
-                            actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                            actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                            actual_fps = cap.get(cv2.CAP_PROP_FPS)
-                            ret, frame = cap.read()
-                            if ret and frame is not None and frame.shape[1] >= test_width * 0.9 and frame.shape[0] >= test_height * 0.9:
-                                best_resolution = (actual_width, actual_height)
-                                best_fps = actual_fps
-                                logger.info(f"[CAMERA] Résolution {actual_width}x{actual_height} supportée pour la caméra {i}")
-                                break
-                            else:
-                                logger.info(f"[CAMERA] Résolution {test_width}x{test_height} non supportée pour la caméra {i}")
-                        if best_resolution:
-                            width, height = best_resolution
-                            fps = best_fps
-                            backend_name = {
-                                cv2.CAP_ANY: "Auto",
-                                cv2.CAP_DSHOW: "DirectShow",
-                                cv2.CAP_V4L2: "V4L2",
-                                cv2.CAP_GSTREAMER: "GStreamer",
-                            }.get(backend, "Inconnu")
-                            name = f"Caméra {i} ({backend_name}) - {width}x{height}@{fps:.1f}fps"
-                            available_cameras.append((i, name))
-                            logger.info(f"[CAMERA] ✓ Caméra fonctionnelle détectée: {name}")
-                            break
-                        else:
-                            logger.info(f"[CAMERA] Caméra {i} ouverte mais ne peut pas lire de frame avec backend {backend_name}")
-                    cap.release()
-                except Exception as e:
-                    if cap:
-                        cap.release()
-                    logger.info(f"[CAMERA] Backend {backend} échoué pour caméra {i}: {e}")
-                    continue
-            if not available_cameras or available_cameras[-1][0] != i:
-                logger.info(f"[CAMERA] ✗ Caméra {i} non disponible ou non fonctionnelle")
+            result = subprocess.run(
+                [v4l2_ctl, "-d", device, "--set-ctrl", control],
+                capture_output=True,
+                timeout=2,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return
+        if result.returncode == 0:
+            applied.append(control)
+    if applied:
+        logger.info(f"[USB CAMERA] Réglages V4L2 appliqués sur {device}: {', '.join(applied)}")
+
+
+def _best_v4l2_mode(modes, max_size=_DETECT_TARGET_RESOLUTION):
+    """Pick the largest mode within ``max_size``, preferring MJPG."""
+    max_width, max_height = max_size
+    candidates = [mode for mode in modes if mode[0] <= max_width and mode[1] <= max_height]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda mode: (mode[2] == "MJPG", mode[0] * mode[1]))
+
+
+def _probe_camera(i):
+    """Probe one camera index; return ``(i, name)`` for the first working backend."""
+    import cv2
+
+    backends = list(_backend_names())
+    target_width, target_height = _DETECT_TARGET_RESOLUTION
+    target_fourcc = None
+
+    modes = _enumerate_v4l2_modes(i)
+    if modes is not None and not modes:
+        # Pas de nœud /dev/video<i> : pas de caméra
+        return None
+    mode = _best_v4l2_mode(modes) if modes else None
+    if mode is not None:
+        # Mode discret connu via V4L2 : une seule configuration à tester
+        target_width, target_height, target_fourcc = mode
+        backends = [cv2.CAP_V4L2]
+
+    for backend in backends:
+        cap = None
+        try:
+            cap = cv2.VideoCapture(i, backend)
+            if not cap.isOpened():
+                continue
+            if target_fourcc == "MJPG":
+                cap.set(cv2.CAP_PROP_FOURCC, _MJPG_FOURCC)
+            # Une seule résolution testée : le pilote se cale sur la plus proche
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, target_width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target_height)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            # grab() suffit à valider le flux : inutile de décoder l'image
+            if not cap.grab():
+                logger.info(f"[CAMERA] Caméra {i} ouverte mais ne peut pas lire de frame avec backend {backend}")
+                continue
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            backend_name = _backend_names().get(backend, "Inconnu")
+            name = f"Caméra {i} ({backend_name}) - {width}x{height}@{fps:.1f}fps"
+            logger.info(f"[CAMERA] ✓ Caméra fonctionnelle détectée: {name}")
+            return (i, name)
         except Exception as e:
-            logger.info(f"[CAMERA] Erreur générale lors de la détection de la caméra {i}: {e}")
+            logger.info(f"[CAMERA] Backend {backend} échoué pour caméra {i}: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+    return None
+
+
+_VIDEO_NODE_RE = re.compile(r"/dev/video(\d+)$")
+# Nœuds mémoire-à-mémoire du Pi (codec, ISP) : jamais des caméras
+_NON_CAPTURE_NAME_HINTS = ("codec", "isp", "rpivid", "hevc", "pispbe")
+
+
+def _is_capture_node(index):
+    """Tell apart real capture nodes using sysfs (metadata/ISP nodes are skipped)."""
+    sysfs = f"/sys/class/video4linux/video{index}"
+    try:
+        with open(os.path.join(sysfs, "index"), "r", encoding="utf-8") as handle:
+            # Les webcams UVC exposent un second nœud (index 1) pour les métadonnées
+            if handle.read().strip() not in ("", "0"):
+                return False
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(sysfs, "name"), "r", encoding="utf-8") as handle:
+            name = handle.read().strip().lower()
+    except OSError:
+        return True
+    return not any(hint in name for hint in _NON_CAPTURE_NAME_HINTS)
+
+
+def _candidate_camera_indices():
+    """Indices worth probing: existing ``/dev/video*`` capture nodes on Linux."""
+    if not sys.platform.startswith("linux"):
+        return list(range(_DETECT_MAX_INDEX))
+    indices = []
+    for path in glob.glob("/dev/video*"):
+        match = _VIDEO_NODE_RE.match(path)
+        if match:
+            indices.append(int(match.group(1)))
+    return [index for index in sorted(indices) if _is_capture_node(index)]
+
+
+def detect_cameras(refresh=False):
+    """Detect available USB cameras.
+
+    Indices are probed in parallel; a non-empty result is kept on disk and
+    reused by the first call of the next start unless ``refresh`` is set.
+    """
+    global _camera_cache_consulted
+    first_call = not _camera_cache_consulted
+    _camera_cache_consulted = True
+    if first_call and not refresh:
+        cached = _load_camera_cache()
+        if cached is not None:
+            logger.info(f"[CAMERA] {len(cached)} caméra(s) reprise(s) du cache {_CAMERA_CACHE_PATH}")
+            return cached
+
+    available_cameras = []
+    logger.info("[CAMERA] Début de la détection des caméras USB...")
+
+    executor = ThreadPoolExecutor(max_workers=_DETECT_WORKERS, thread_name_prefix="camera-probe")
+    futures = [executor.submit(_probe_camera, i) for i in _candidate_camera_indices()]
+    try:
+        for future in as_completed(futures, timeout=_DETECT_TIMEOUT_SECONDS):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.info(f"[CAMERA] Erreur générale lors de la détection: {e}")
+                continue
+            if result is not None:
+                available_cameras.append(result)
+    except FuturesTimeoutError:
+        logger.info(f"[CAMERA] Détection interrompue après {_DETECT_TIMEOUT_SECONDS:.0f}s, sondes restantes ignorées")
+    finally:
+        # Ne pas attendre un pilote bloqué à l'ouverture
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    available_cameras.sort()
     logger.info(f"[CAMERA] Détection terminée. {len(available_cameras)} caméra(s) fonctionnelle(s) trouvée(s)")
+    if available_cameras:
+        # Un résultat vide n'est pas mémorisé : une caméra branchée plus tard
+        # doit être détectée au prochain appel
+        _store_camera_cache(available_cameras)
     return available_cameras
 
 
+_RECONNECT_BASE_DELAY = 0.1
+_RECONNECT_MAX_DELAY = 2.0
+# Au-delà, la caméra est déclarée perdue et la boucle de capture s'arrête
+_RECONNECT_MAX_ATTEMPTS = 15
+# Sans lecteur depuis ce délai, la boucle de capture ne décode ni n'encode plus
+_IDLE_CONSUMER_SECONDS = 1.0
+
+
 class UsbCamera:
-    def __init__(self, camera_id=0):
+    def __init__(self, camera_id=0, jpeg_quality=85):
         self.camera_id = camera_id
+        self.jpeg_quality = jpeg_quality
         self.camera = None
         self.is_running = False
         self.thread = None
-        self.frame = None
+        self._frame_slot = deque(maxlen=1)
         self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
         self.error = None
+        self.passthrough = False
+        # Frames brutes en attente d'encodage (les plus anciennes sont écartées)
+        self._raw_q = queue.Queue(maxsize=2)
+        self.encoder_thread = None
+        self._reconnect_attempts = 0
+        self._last_consumed = time.monotonic()
+        # Vrai pendant une reconnexion (exposé par /api/camera_status)
+        self.degraded = False
 
     def start(self):
         if self.is_running:
             return True
-        return self._initialize_camera()
+        if not self._open_device():
+            return False
+        self.is_running = True
+        self._reconnect_attempts = 0
+        self.degraded = False
+        # Seul start() lance les threads : une reconnexion rouvre le périphérique
+        # sans ajouter de lecteur concurrent sur le même VideoCapture
+        self.encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.encoder_thread.start()
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def _open_device(self):
+        """Open and configure the capture device; no thread is started."""
+        import cv2
 
-    def _initialize_camera(self):
-        backends = [cv2.CAP_DSHOW, cv2.CAP_ANY, cv2.CAP_V4L2, cv2.CAP_GSTREAMER]
-        for backend in backends:
+        for backend, backend_name in _backend_names().items():
             try:
-                backend_name = {
-                    cv2.CAP_ANY: "Auto",
-                    cv2.CAP_DSHOW: "DirectShow",
-                    cv2.CAP_V4L2: "V4L2",
-                    cv2.CAP_GSTREAMER: "GStreamer",
-                }.get(backend, "Inconnu")
                 logger.info(f"[USB CAMERA] Tentative d'ouverture de la caméra {self.camera_id} avec backend {backend_name}...")
                 self.camera = cv2.VideoCapture(self.camera_id, backend)
                 if not self.camera.isOpened():
@@ -112,11 +398,22 @@ class UsbCamera:
                     if self.camera:
                         self.camera.release()
                     continue
+                # File du pilote limitée à une frame pour éviter la latence accumulée
+                buffer_limited = self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                logger.info(f"[USB CAMERA] CAP_PROP_BUFFERSIZE=1 {'appliqué' if buffer_limited else 'non supporté'}")
+                # Demander le MJPEG natif avant de choisir la résolution
+                self.camera.set(cv2.CAP_PROP_FOURCC, _MJPG_FOURCC)
                 resolutions_to_test = [
                     (1920, 1080, "Full HD"),
                     (1280, 720, "HD"),
                     (640, 480, "VGA"),
                 ]
+                modes = _enumerate_v4l2_modes(self.camera_id)
+                best_mode = _best_v4l2_mode(modes) if modes else None
+                if best_mode is not None:
+                    # Résolution connue via V4L2 : une seule configuration à appliquer
+                    mode_width, mode_height, mode_fourcc = best_mode
+                    resolutions_to_test = [(mode_width, mode_height, f"{mode_width}x{mode_height} {mode_fourcc}")]
                 best_resolution = None
                 for test_width, test_height, res_name in resolutions_to_test:
                     self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, test_width)
@@ -125,8 +422,8 @@ class UsbCamera:
                     actual_width = int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
                     actual_height = int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
                     actual_fps = self.camera.get(cv2.CAP_PROP_FPS)
-                    ret, frame = self.camera.read()
-                    if ret and frame is not None and frame.shape[1] >= test_width * 0.9 and frame.shape[0] >= test_height * 0.9:
+                    ret = self.camera.grab()
+                    if ret and actual_width >= test_width * 0.9 and actual_height >= test_height * 0.9:
                         best_resolution = (actual_width, actual_height, actual_fps, res_name)
                         logger.info(
                             f"[USB CAMERA] Résolution {res_name} ({actual_width}x{actual_height}@{actual_fps:.1f}fps) configurée avec succès"
@@ -134,20 +431,23 @@ class UsbCamera:
                         break
                     else:
                         logger.info(f"[USB CAMERA] Résolution {res_name} ({test_width}x{test_height}) non supportée")
+                if best_resolution and backend in (cv2.CAP_V4L2, cv2.CAP_ANY):
+                    _apply_driver_tuning(self.camera_id)
                 if not best_resolution:
                     logger.info(f"[USB CAMERA] Backend {backend_name} : aucune résolution fonctionnelle trouvée")
                     self.camera.release()
                     continue
-                ret, frame = self.camera.read()
+                # Un seul décodage pour confirmer que le flux produit des images
+                ret, frame = self.camera.retrieve() if self.camera.grab() else (False, None)
                 if not ret or frame is None:
                     logger.info(
                         f"[USB CAMERA] Backend {backend_name} : la caméra {self.camera_id} ne retourne pas d'image de manière stable"
                     )
                     self.camera.release()
                     continue
-                self.is_running = True
-                self.thread = threading.Thread(target=self._capture_loop, daemon=True)
-                self.thread.start()
+                self.passthrough = _enable_mjpeg_passthrough(self.camera)
+                if self.passthrough:
+                    logger.info("[USB CAMERA] Flux MJPEG natif utilisé sans réencodage")
                 logger.info(f"[USB CAMERA] Caméra {self.camera_id} démarrée avec succès via backend {backend_name}")
                 return True
             except Exception as e:
@@ -160,12 +460,27 @@ class UsbCamera:
         return False
 
     def _reconnect(self):
-        logger.info(f"[USB CAMERA] Tentative de reconnexion de la caméra {self.camera_id}...")
+        self.degraded = True
         if self.camera:
             self.camera.release()
         self.camera = None
-        time.sleep(1)
-        return self._initialize_camera()
+        if self._reconnect_attempts >= _RECONNECT_MAX_ATTEMPTS:
+            self.error = f"Caméra {self.camera_id} perdue après {self._reconnect_attempts} tentatives de reconnexion"
+            logger.info(f"[USB CAMERA] Erreur: {self.error}")
+            self.is_running = False
+            with self.frame_ready:
+                self.frame_ready.notify_all()
+            return False
+        logger.info(f"[USB CAMERA] Tentative de reconnexion de la caméra {self.camera_id}...")
+        # Attente exponentielle : 100 ms, 200 ms, 400 ms... plafonnée à 2 s
+        delay = min(_RECONNECT_MAX_DELAY, _RECONNECT_BASE_DELAY * 2 ** self._reconnect_attempts)
+        self._reconnect_attempts += 1
+        time.sleep(delay)
+        if not self.is_running or not self._open_device():
+            return False
+        self._reconnect_attempts = 0
+        self.degraded = False
+        return True
 
     def _capture_loop(self):
         consecutive_errors = 0
@@ -175,13 +490,23 @@ class UsbCamera:
                 if not self.camera or not self.camera.isOpened():
                     logger.info(f"[USB CAMERA] Caméra {self.camera_id} déconnectée, tentative de reconnexion...")
                     self._reconnect()
-                    time.sleep(1)
                     continue
-                ret, frame = self.camera.read()
-                if ret:
-                    _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    with self.lock:
-                        self.frame = jpeg.tobytes()
+                if time.monotonic() - self._last_consumed > _IDLE_CONSUMER_SECONDS:
+                    # Personne ne regarde : vider le tampon du pilote sans décoder
+                    if self.camera.grab():
+                        consecutive_errors = 0
+                        continue
+                    ret, frame = False, None
+                else:
+                    ret, frame = self.camera.retrieve() if _grab_latest(self.camera) else (False, None)
+                if ret and frame is not None and not self.passthrough:
+                    # L'encodage JPEG se fait dans _encode_loop
+                    self._queue_raw_frame(frame)
+                    consecutive_errors = 0
+                    continue
+                frame_bytes = _raw_jpeg(frame) if ret else None
+                if frame_bytes is not None:
+                    self._publish_frame(frame_bytes)
                     consecutive_errors = 0
                 else:
                     consecutive_errors += 1
@@ -190,7 +515,6 @@ class UsbCamera:
                         logger.info(f"[USB CAMERA] Trop d'erreurs consécutives, tentative de reconnexion...")
                         self._reconnect()
                         consecutive_errors = 0
-                time.sleep(0.03)
             except Exception as e:
                 consecutive_errors += 1
                 logger.info(f"[USB CAMERA] Erreur de capture: {e} (tentative {consecutive_errors}/{max_errors})")
@@ -200,15 +524,64 @@ class UsbCamera:
                     consecutive_errors = 0
                 time.sleep(0.1)
 
-    def get_frame(self):
-        with self.lock:
-            return self.frame
+    def _queue_raw_frame(self, frame):
+        """Push a raw frame for the encoder, dropping the oldest one when full."""
+        while True:
+            try:
+                self._raw_q.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self._raw_q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _publish_frame(self, frame_bytes):
+        # append() sur une deque(maxlen=1) est atomique : les lecteurs ne bloquent jamais
+        self._frame_slot.append(frame_bytes)
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+
+    def _encode_loop(self):
+        """Encode raw frames to JPEG off the capture thread."""
+        import cv2
+
+        while self.is_running:
+            try:
+                frame = self._raw_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            except Exception as e:
+                logger.info(f"[USB CAMERA] Erreur d'encodage JPEG: {e}")
+                continue
+            if ret:
+                self._publish_frame(_jpeg_view(jpeg))
+            else:
+                logger.info("[USB CAMERA] Encodage JPEG échoué")
+
+    def get_frame(self, wait=False, timeout=1.0):
+        """Retourne la dernière frame JPEG ; avec ``wait``, attend la suivante."""
+        self._last_consumed = time.monotonic()
+        if wait:
+            with self.frame_ready:
+                self.frame_ready.wait(timeout)
+        try:
+            return self._frame_slot[-1]
+        except IndexError:
+            return None
 
     def stop(self):
         self.is_running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2)
         self.thread = None
+        if self.encoder_thread and self.encoder_thread.is_alive():
+            self.encoder_thread.join(timeout=2)
+        self.encoder_thread = None
         if self.camera:
             try:
                 self.camera.release()
@@ -220,16 +593,18 @@ class UsbCamera:
 class PiCameraStream:
     """Gestion d'un flux Picamera2 sous forme de MJPEG."""
 
-    def __init__(self, resolution=(1280, 720), framerate=15):
+    def __init__(self, resolution=(1280, 720), framerate=15, jpeg_quality=85):
         if not PICAMERA2_AVAILABLE:
             raise RuntimeError("Picamera2 non disponible sur ce système")
 
         self.resolution = resolution
         self.framerate = framerate
+        self.jpeg_quality = jpeg_quality
         self.picam = None
         self.thread = None
-        self.frame = None
+        self._frame_slot = deque(maxlen=1)
         self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
         self.is_running = False
         self.error = None
 
@@ -238,6 +613,8 @@ class PiCameraStream:
             return True
 
         try:
+            from picamera2 import Picamera2
+
             self.picam = Picamera2()
             video_config = self.picam.create_video_configuration(
                 main={"size": self.resolution, "format": "RGB888"},
@@ -258,30 +635,44 @@ class PiCameraStream:
         return True
 
     def _capture_loop(self):
+        import cv2
+
         while self.is_running and self.picam:
             try:
                 frame = self.picam.capture_array("main")
                 if frame is None:
                     time.sleep(0.01)
                     continue
-                ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
                 if not ret:
                     logger.info("[PICAMERA2] Impossible d'encoder la frame en JPEG")
                     time.sleep(0.01)
                     continue
-                with self.lock:
-                    self.frame = jpeg.tobytes()
+                self._publish_frame(_jpeg_view(jpeg))
             except Exception as err:
                 logger.info(f"[PICAMERA2] Erreur de capture: {err}")
                 self.error = str(err)
                 time.sleep(0.05)
 
-    def get_frame(self):
-        with self.lock:
-            return self.frame
+    def get_frame(self, wait=False, timeout=1.0):
+        """Retourne la dernière frame JPEG ; avec ``wait``, attend la suivante."""
+        if wait:
+            with self.frame_ready:
+                self.frame_ready.wait(timeout)
+        try:
+            return self._frame_slot[-1]
+        except IndexError:
+            return None
+
+    def _publish_frame(self, frame_bytes):
+        self._frame_slot.append(frame_bytes)
+        with self.frame_ready:
+            self.frame_ready.notify_all()
 
     def stop(self):
         self.is_running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2)
         self.thread = None
@@ -297,6 +688,6 @@ class PiCameraStream:
                 pass
 
         self.picam = None
-        self.frame = None
+        self._frame_slot.clear()
         logger.info("[PICAMERA2] Flux Picamera2 arrêté")
 
@@ -1,6 +1,14 @@
 import os
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
 
 PHOTOS_FOLDER = 'photos'
 EFFECT_FOLDER = 'effet'
@@ -27,11 +35,46 @@ DEFAULT_CONFIG = {
     'printer_enabled': True,
     'printer_port': '/dev/ttyAMA0',
     'printer_baudrate': 9600,
-    'print_resolution': 384
+    'print_resolution': 384,
+    'preview_jpeg_quality': 72,
+    'capture_jpeg_quality': 92
 }
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Immutable snapshot of the settings read on the capture/effect path"""
+    telegram_send_type: str
+    effect_enabled: bool
+    effect_prompt: str
+    effect_steps: int
+    runware_api_key: str
+
+    @classmethod
+    def from_dict(cls, config_data):
+        return cls(
+            telegram_send_type=config_data.get('telegram_send_type', DEFAULT_CONFIG['telegram_send_type']),
+            effect_enabled=config_data.get('effect_enabled', DEFAULT_CONFIG['effect_enabled']),
+            effect_prompt=config_data.get('effect_prompt', DEFAULT_CONFIG['effect_prompt']),
+            effect_steps=config_data.get('effect_steps', DEFAULT_CONFIG['effect_steps']),
+            runware_api_key=config_data.get('runware_api_key', DEFAULT_CONFIG['runware_api_key']),
+        )
+
+
+_runtime_config = RuntimeConfig.from_dict(DEFAULT_CONFIG)
+
+
+def get_runtime_config():
+    """Return the snapshot of the last loaded or saved configuration"""
+    return _runtime_config
+
+
+def _refresh_runtime_config(config_data):
+    global _runtime_config
+    _runtime_config = RuntimeConfig.from_dict(config_data)
+
 def ensure_directories():
     """Create photos and effect folders if missing"""
     logger.info(f"[DEBUG] Création du dossier photos: {PHOTOS_FOLDER}")
@@ -42,17 +85,83 @@ def ensure_directories():
         f"[DEBUG] Dossiers créés - Photos: {os.path.exists(PHOTOS_FOLDER)}, Effet: {os.path.exists(EFFECT_FOLDER)}"
     )
 
-def load_config():
-    """Load configuration from JSON"""
-    if os.path.exists(CONFIG_FILE):
+_cached_cfg = None
+_cached_cfg_lock = threading.Lock()
+
+_config_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='config-writer')
+_pending_write = None
+_pending_lock = threading.Lock()
+
+
+def _write_config_bytes(payload):
+    tmp_path = CONFIG_FILE + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, CONFIG_FILE)
+
+
+def _log_write_error(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error(f"[CONFIG] Échec de l'écriture de {CONFIG_FILE}: {exc}")
+
+
+def flush_config():
+    """Wait for the last queued configuration write to reach the disk"""
+    with _pending_lock:
+        pending = _pending_write
+    if pending is not None:
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            pending.result()
         except Exception:
             pass
-    return DEFAULT_CONFIG.copy()
+
+
+def _parse_config(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_config():
+    """Load configuration from JSON (reparsed only when the file changes)"""
+    global _cached_cfg
+    flush_config()
+    with _cached_cfg_lock:
+        try:
+            mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns is not None and _cached_cfg is not None and _cached_cfg[0] == mtime_ns:
+            return dict(_cached_cfg[1])
+
+        config_data = None
+        if mtime_ns is not None:
+            try:
+                with open(CONFIG_FILE, 'rb') as f:
+                    config_data = _parse_config(f.read())
+            except Exception:
+                pass
+        if config_data is None:
+            config_data = DEFAULT_CONFIG.copy()
+            _cached_cfg = None
+        else:
+            _cached_cfg = (mtime_ns, config_data)
+        _refresh_runtime_config(config_data)
+        return dict(config_data)
 
 def save_config(config_data):
-    """Save configuration to JSON"""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config_data, f, indent=2, ensure_ascii=False)
+    """Save configuration to JSON (written in the background, atomically)
+
+    Returns the Future of the write; its result() raises the write error.
+    """
+    global _pending_write, _cached_cfg
+    payload = json.dumps(config_data, indent=2, ensure_ascii=False).encode('utf-8')
+    with _cached_cfg_lock:
+        _cached_cfg = None
+    with _pending_lock:
+        _pending_write = _config_writer.submit(_write_config_bytes, payload)
+        _pending_write.add_done_callback(_log_write_error)
+        pending = _pending_write
+    _refresh_runtime_config(config_data)
+    return pending
@@ -6,7 +6,8 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-from usb_utils import SAVE_DIR, USB_ROOT, check_usb_health, ensure_save_directory, find_usb_root
+import usb_utils
+from usb_utils import check_usb_health, ensure_save_directory, find_usb_root
 
 
 def describe_path(path: Path | None) -> str:
@@ -33,11 +34,12 @@ def test_write(save_dir: Path) -> tuple[bool, str]:
 
 def main() -> int:
     detected = find_usb_root()
+    # La détection est faite au premier usage : lire les chemins après la sonde
+    health = check_usb_health(test_write=True, force_write_probe=True)
     print("=== Diagnostic USB ===")
     print(f"Chemin détecté : {describe_path(detected)}")
-    print(f"Chemin courant : {describe_path(USB_ROOT)}")
+    print(f"Chemin courant : {describe_path(usb_utils.USB_ROOT)}")
 
-    health = check_usb_health(test_write=True)
     print("\n--- État ---")
     print(f"Monté          : {health.mounted}")
     print(f"Écriture OK    : {health.writable}")
@@ -48,7 +50,7 @@ def main() -> int:
     if health.detail:
         print(f"Code détail    : {health.detail}")
 
-    save_dir = SAVE_DIR or (detected / "sauvegardes" if detected else None)
+    save_dir = usb_utils.SAVE_DIR or (detected / "sauvegardes" if detected else None)
     print(f"\nDossier sauvegarde : {describe_path(save_dir)}")
 
     if health.mounted and health.writable and save_dir is not None:
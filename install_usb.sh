@@ -96,7 +96,18 @@ if [[ -n "$BEST_UUID" ]]; then
     esac
 
     new_entry="UUID=${BEST_UUID} ${USB_MOUNT_POINT} ${mount_type} ${mount_opts} 0 0"
-    if grep -q "${USB_MOUNT_POINT}" /etc/fstab || grep -q "${BEST_UUID}" /etc/fstab; then
+    if command -v findmnt >/dev/null 2>&1; then
+        # Recherche exacte (point de montage ou UUID), sans faux positif de sous-chaîne
+        fstab_has_entry() {
+            findmnt --fstab -n --mountpoint "${USB_MOUNT_POINT}" >/dev/null 2>&1 \
+                || findmnt --fstab -n --source "UUID=${BEST_UUID}" >/dev/null 2>&1
+        }
+    else
+        fstab_has_entry() {
+            grep -q "${USB_MOUNT_POINT}" /etc/fstab || grep -q "${BEST_UUID}" /etc/fstab
+        }
+    fi
+    if fstab_has_entry; then
         echo "Une entrée fstab existe déjà pour ${USB_MOUNT_POINT} ou l'UUID ${BEST_UUID}, aucune modification apportée."
     else
         echo "$new_entry" >> /etc/fstab
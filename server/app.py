@@ -7,24 +7,36 @@ USB et une route de santé détaillée.
 from __future__ import annotations
 
 import glob
+import importlib.util
+import json
 import logging
 import os
+import shutil
+import subprocess
+import sys
 import threading
 import time
 from collections import deque
 from datetime import datetime
-from typing import Deque, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Optional
 
-import cv2
 from flask import Flask, Response, jsonify
 
+if TYPE_CHECKING:  # pragma: no cover
+    import cv2
+    from picamera2 import Picamera2
+
 try:
-    from picamera2 import Picamera2  # type: ignore
+    import psutil  # type: ignore
+
+    # L'heure de démarrage ne change pas : lue une seule fois
+    BOOT_TIME: Optional[float] = psutil.boot_time()
+except Exception:  # pragma: no cover - psutil optionnel
+    BOOT_TIME = None
 
-    PICAMERA2_AVAILABLE = True
-except Exception:  # pragma: no cover - dépend de l'environnement Raspberry Pi
-    Picamera2 = None  # type: ignore
-    PICAMERA2_AVAILABLE = False
+# Import différé : Picamera2 n'est chargé qu'à l'ouverture de la caméra
+PICAMERA2_AVAILABLE = importlib.util.find_spec("picamera2") is not None
 
 LOG_FORMAT = "[%(levelname)s] %(asctime)s :: %(message)s"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
@@ -38,7 +50,43 @@ _last_backend: Optional[str] = None
 _last_error: Optional[str] = None
 _recent_errors: Deque[str] = deque(maxlen=10)
 
-JPEG_PARAMS = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+# config.json du photobooth (racine du dépôt), surchargeable par variable d'environnement
+CONFIG_FILE = os.environ.get(
+    "SIMPLEBOOTH_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json"),
+)
+DEFAULT_PREVIEW_JPEG_QUALITY = 72
+
+
+def _load_preview_quality() -> int:
+    """Qualité JPEG du flux lue une fois au démarrage (clé ``preview_jpeg_quality``)."""
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as handle:
+            quality = int(json.load(handle).get("preview_jpeg_quality", DEFAULT_PREVIEW_JPEG_QUALITY))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return DEFAULT_PREVIEW_JPEG_QUALITY
+    return min(max(quality, 1), 100)
+
+
+def _build_jpeg_params(quality: int) -> list:
+    import cv2
+
+    # Pas d'optimisation Huffman ni de JPEG progressif : encodage plus rapide pour un aperçu
+    return [
+        int(cv2.IMWRITE_JPEG_QUALITY), quality,
+        int(cv2.IMWRITE_JPEG_OPTIMIZE), 0,
+        int(cv2.IMWRITE_JPEG_PROGRESSIVE), 0,
+    ]
+
+
+@lru_cache(maxsize=1)
+def _jpeg_params() -> list:
+    """Paramètres d'encodage, construits au premier encodage (import de cv2 différé)."""
+    return _build_jpeg_params(_load_preview_quality())
+
+
+# Équivalent de cv2.VideoWriter_fourcc(*"MJPG"), sans importer cv2
+MJPG_FOURCC = int.from_bytes(b"MJPG", "little")
 
 
 def _update_last_frame(timestamp: float, backend: str) -> None:
@@ -58,9 +106,11 @@ def _push_error(error: Exception | str) -> None:
     logger.error("%s", entry)
 
 
-def _open_picamera() -> Optional[Picamera2]:
+def _open_picamera() -> Optional["Picamera2"]:
     if not PICAMERA2_AVAILABLE:
         return None
+    from picamera2 import Picamera2  # type: ignore
+
     logger.info("[CAMERA] Initialisation Picamera2 ...")
     picam2 = Picamera2()
     config = picam2.create_video_configuration(
@@ -73,50 +123,235 @@ def _open_picamera() -> Optional[Picamera2]:
     return picam2
 
 
-def _yield_picamera_frames(picam2: Picamera2):
-    global _last_frame_ts
+def _yield_picamera_frames(picam2: "Picamera2"):
+    import cv2
+
     while True:
         frame = picam2.capture_array()
         if frame is None:
             raise RuntimeError("Frame Picamera2 vide")
-        ret, jpeg = cv2.imencode(".jpg", frame, JPEG_PARAMS)
+        ret, jpeg = cv2.imencode(".jpg", frame, _jpeg_params())
         if not ret:
             raise RuntimeError("Encodage JPEG Picamera2 échoué")
         ts = time.time()
         _update_last_frame(ts, "picamera2")
-        yield jpeg.tobytes()
+        yield _jpeg_view(jpeg)
+
+
+V4L2_TUNING_CONTROLS = (
+    "exposure_auto_priority=0",
+    "exposure_dynamic_framerate=0",
+    "power_line_frequency=1",
+)
+
+
+def _apply_driver_tuning(index: int) -> None:
+    """Cadence constante côté pilote (auto-exposition sans rallonge du temps de pose)."""
+    v4l2_ctl = shutil.which("v4l2-ctl") if sys.platform.startswith("linux") else None
+    if v4l2_ctl is None:
+        return
+    for control in V4L2_TUNING_CONTROLS:
+        try:
+            subprocess.run(
+                [v4l2_ctl, "-d", f"/dev/video{index}", "--set-ctrl", control],
+                capture_output=True,
+                timeout=2,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return
+
+
+NON_CAPTURE_NAME_HINTS = ("codec", "isp", "rpivid", "hevc", "pispbe")
+
+
+def _is_capture_node(device: str) -> bool:
+    """Écarte les nœuds de métadonnées UVC et les périphériques codec/ISP du Pi."""
+    sysfs = os.path.join("/sys/class/video4linux", os.path.basename(device))
+    try:
+        with open(os.path.join(sysfs, "index"), "r", encoding="utf-8") as handle:
+            if handle.read().strip() not in ("", "0"):
+                return False
+        with open(os.path.join(sysfs, "name"), "r", encoding="utf-8") as handle:
+            name = handle.read().strip().lower()
+    except OSError:
+        return True
+    return not any(hint in name for hint in NON_CAPTURE_NAME_HINTS)
+
+
+def _capture_devices() -> list:
+    return [device for device in sorted(glob.glob("/dev/video*")) if _is_capture_node(device)]
 
 
 def _open_usb_camera(index: int = 0) -> cv2.VideoCapture:
+    import cv2
+
     logger.info("[CAMERA] Tentative d'ouverture webcam USB index=%s", index)
     cap = cv2.VideoCapture(index)
     if not cap.isOpened():
         cap.release()
         raise RuntimeError("Aucune caméra USB disponible (index 0).")
+    buffer_limited = cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    logger.info("[CAMERA] CAP_PROP_BUFFERSIZE=1 %s", "appliqué" if buffer_limited else "non supporté")
+    # MJPEG natif demandé avant la résolution (la plupart des webcams UVC le gèrent)
+    cap.set(cv2.CAP_PROP_FOURCC, MJPG_FOURCC)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
     cap.set(cv2.CAP_PROP_FPS, 25)
+    _apply_driver_tuning(index)
     logger.info("[CAMERA] Webcam USB démarrée")
     return cap
 
 
+BUFFERED_GRAB_SECONDS = 0.005
+MAX_DRAIN_GRABS = 5
+
+
+def _grab_latest(cap: cv2.VideoCapture) -> bool:
+    """grab() jusqu'à une frame fraîche : une frame en tampon revient en < 5 ms."""
+    for _ in range(MAX_DRAIN_GRABS):
+        start = time.monotonic()
+        if not cap.grab():
+            return False
+        if time.monotonic() - start > BUFFERED_GRAB_SECONDS:
+            break
+    return True
+
+
+def _raw_jpeg(frame) -> Optional[bytes]:
+    """Octets JPEG si ``frame`` est le buffer MJPEG brut renvoyé par le pilote."""
+    if frame is None or frame.ndim == 3:
+        return None
+    data = frame.reshape(-1)
+    if data[:2].tobytes() != b"\xff\xd8":
+        return None
+    return data.tobytes()
+
+
+def _jpeg_view(jpeg) -> memoryview:
+    """Vue sur le buffer renvoyé par ``cv2.imencode`` : aucune copie des octets."""
+    return memoryview(jpeg.reshape(-1))
+
+
+def _enable_mjpeg_passthrough(cap: cv2.VideoCapture) -> bool:
+    """Désactive le décodage OpenCV quand la webcam fournit déjà du MJPEG."""
+    import cv2
+
+    if int(cap.get(cv2.CAP_PROP_FOURCC)) != MJPG_FOURCC:
+        return False
+    if not cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+        return False
+    ok, frame = cap.read()
+    if ok and _raw_jpeg(frame) is not None:
+        logger.info("[CAMERA] Flux MJPEG natif utilisé sans réencodage")
+        return True
+    cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    return False
+
+
 def _yield_usb_frames(cap: cv2.VideoCapture):
+    import cv2
+
+    passthrough = _enable_mjpeg_passthrough(cap)
     while True:
-        ok, frame = cap.read()
+        ok, frame = cap.retrieve() if _grab_latest(cap) else (False, None)
         if not ok or frame is None:
             raise RuntimeError("Lecture webcam USB impossible.")
-        ret, jpeg = cv2.imencode(".jpg", frame, JPEG_PARAMS)
-        if not ret:
-            raise RuntimeError("Encodage JPEG webcam USB échoué")
+        if passthrough:
+            jpeg_bytes = _raw_jpeg(frame)
+            if jpeg_bytes is None:
+                raise RuntimeError("Frame MJPEG webcam USB invalide")
+        else:
+            ret, jpeg = cv2.imencode(".jpg", frame, _jpeg_params())
+            if not ret:
+                raise RuntimeError("Encodage JPEG webcam USB échoué")
+            jpeg_bytes = _jpeg_view(jpeg)
         ts = time.time()
         _update_last_frame(ts, "usb")
-        yield jpeg.tobytes()
+        yield jpeg_bytes
 
 
-@app.get("/camera/stream")
-def stream() -> Response:
-    """Flux MJPEG multi-source."""
-    def generate():
+_PART_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+_PART_TAIL = b"\r\n"
+
+
+def _close_picamera(picam2: "Picamera2") -> None:
+    try:
+        picam2.stop()
+    except Exception:
+        pass
+    try:
+        picam2.close()
+    except Exception:
+        pass
+
+
+class CameraBroker:
+    """Propriétaire unique de la caméra, partagé par tous les clients du flux.
+
+    Un thread producteur capture et encode une seule fois ; chaque connexion
+    ``/camera/stream`` lit la dernière frame publiée. La caméra est libérée
+    quand le dernier client se détache.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        self._clients = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.latest_jpeg: Optional[bytes] = None
+        self._seq = 0
+
+    @property
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def attach(self) -> int:
+        """Enregistre un client et démarre la capture si nécessaire."""
+        with self._lock:
+            self._clients += 1
+            self._stop_event.clear()
+            if not self.running:
+                self.start()
+            return self._seq
+
+    def detach(self) -> None:
+        """Retire un client ; arrête la capture quand il n'en reste aucun."""
+        with self._lock:
+            self._clients = max(0, self._clients - 1)
+            if self._clients == 0:
+                self._stop_event.set()
+                self._frame_ready.notify_all()
+
+    def start(self) -> None:
+        """Lance le thread producteur (appelé sous ``_lock``)."""
+        self.latest_jpeg = None
+        self._thread = threading.Thread(target=self._run, name="camera-broker", daemon=True)
+        self._thread.start()
+
+    def wait_for_new(self, last_seq: int, timeout: float = 1.0) -> tuple[int, Optional[bytes]]:
+        """Attend une frame plus récente que ``last_seq``.
+
+        Retourne ``(seq, jpeg)`` ; ``jpeg`` vaut None si rien n'est arrivé
+        avant ``timeout``.
+        """
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: self._seq != last_seq or self._stop_event.is_set() or not self.running,
+                timeout=timeout,
+            )
+            if self._seq == last_seq:
+                return last_seq, None
+            return self._seq, self.latest_jpeg
+
+    def _publish(self, jpeg: bytes) -> None:
+        with self._frame_ready:
+            self.latest_jpeg = jpeg
+            self._seq += 1
+            self._frame_ready.notify_all()
+
+    def _run(self) -> None:
         picam2 = None
         usb_cap = None
         try:
@@ -124,57 +359,65 @@ def stream() -> Response:
                 try:
                     picam2 = _open_picamera()
                     for jpeg in _yield_picamera_frames(picam2):
-                        yield (
-                            b"--frame\r\n"
-                            b"Content-Type: image/jpeg\r\n\r\n"
-                            + jpeg
-                            + b"\r\n"
-                        )
+                        if self._stop_event.is_set():
+                            return
+                        self._publish(jpeg)
                 except Exception as err:
                     _push_error(f"Pi Camera indisponible: {err}")
                     if picam2 is not None:
-                        try:
-                            picam2.stop()
-                        except Exception:
-                            pass
-                        try:
-                            picam2.close()
-                        except Exception:
-                            pass
+                        _close_picamera(picam2)
                         picam2 = None
                     logger.info("[CAMERA] Bascule sur webcam USB")
 
             usb_cap = _open_usb_camera()
             for jpeg in _yield_usb_frames(usb_cap):
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n"
-                    + jpeg
-                    + b"\r\n"
-                )
+                if self._stop_event.is_set():
+                    return
+                self._publish(jpeg)
         except Exception as err:
             _push_error(err)
-            raise
         finally:
             if picam2 is not None:
-                try:
-                    picam2.stop()
-                except Exception:
-                    pass
-                try:
-                    picam2.close()
-                except Exception:
-                    pass
+                _close_picamera(picam2)
             if usb_cap is not None:
                 usb_cap.release()
+            logger.info("[CAMERA] Capture arrêtée")
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+
+
+broker = CameraBroker()
+
+
+@app.get("/camera/stream")
+def stream() -> Response:
+    """Flux MJPEG multi-source."""
+    def generate():
+        seq = broker.attach()
+        try:
+            while True:
+                seq, jpeg = broker.wait_for_new(seq, timeout=1.0)
+                if jpeg is None:
+                    if not broker.running:
+                        break
+                    continue
+                # Le serveur WSGI exige des bytes : join() ne copie la frame qu'une fois
+                yield b"".join((_PART_HEADER % len(jpeg), jpeg, _PART_TAIL))
+        finally:
+            broker.detach()
 
     response = Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
     response.headers["Access-Control-Allow-Origin"] = "*"
     return response
 
 
-@app.get("/camera/health")
-def health() -> Response:
+HEALTH_TTL_SECONDS = 1.0
+_health_cache: dict = {"ts": 0.0, "system": None}
+_health_lock = threading.Lock()
+
+
+def _probe_system_health() -> dict:
+    """Vérifications OS (groupe video, nœuds /dev/video, uptime)."""
     import getpass
     import grp
 
@@ -192,6 +435,27 @@ def health() -> Response:
     if os.geteuid() == 0:
         video_group_ok = True
 
+    return {
+        "video_group_ok": video_group_ok,
+        "dev_video": _capture_devices(),
+        "uptime_seconds": time.time() - BOOT_TIME if BOOT_TIME else None,
+    }
+
+
+def _cached_system_health() -> dict:
+    """Résultat de ``_probe_system_health`` mis en cache ``HEALTH_TTL_SECONDS``."""
+    with _health_lock:
+        now = time.monotonic()
+        if _health_cache["system"] is None or now - _health_cache["ts"] >= HEALTH_TTL_SECONDS:
+            _health_cache["system"] = _probe_system_health()
+            _health_cache["ts"] = now
+        return _health_cache["system"]
+
+
+@app.get("/camera/health")
+def health() -> Response:
+    system = _cached_system_health()
+
     with _frame_lock:
         last_ts = _last_frame_ts
         backend = _last_backend
@@ -199,14 +463,14 @@ def health() -> Response:
 
     payload = {
         "has_picamera2": PICAMERA2_AVAILABLE,
-        "video_group_ok": video_group_ok,
-        "dev_video": sorted(glob.glob("/dev/video*")),
+        "video_group_ok": system["video_group_ok"],
+        "dev_video": system["dev_video"],
         "last_frame_ts": last_ts,
         "last_frame_iso": datetime.utcfromtimestamp(last_ts).isoformat() + "Z" if last_ts else None,
         "last_backend": backend,
         "last_error": last_error,
         "recent_errors": list(_recent_errors),
-        "uptime_seconds": time.time() - psutil.boot_time() if _psutil_available() else None,
+        "uptime_seconds": system["uptime_seconds"],
     }
 
     response = jsonify(payload)
@@ -214,16 +478,6 @@ def health() -> Response:
     return response
 
 
-def _psutil_available() -> bool:
-    try:
-        import psutil  # type: ignore
-
-        globals()["psutil"] = psutil
-        return True
-    except Exception:
-        return False
-
-
 @app.after_request
 def add_cors_headers(response: Response) -> Response:  # pragma: no cover - simple entête
     response.headers.setdefault("Access-Control-Allow-Origin", "*")
@@ -234,4 +488,11 @@ def add_cors_headers(response: Response) -> Response:  # pragma: no cover - simp
 
 if __name__ == "__main__":
     logger.info("Serveur caméra en écoute sur 0.0.0.0:8080")
-    app.run(host="0.0.0.0", port=8080, threaded=True)
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("[SERVER] waitress absent, utilisation du serveur de développement Flask")
+        app.run(host="0.0.0.0", port=8080, threaded=True)
+    else:
+        # Un seul thread de capture (CameraBroker) alimente tous les clients du flux
+        serve(app, host="0.0.0.0", port=8080, threads=8, channel_timeout=300, asyncore_use_poll=True)
@@ -1,32 +1,56 @@
 """Utilitaires pour la gestion de la sauvegarde USB."""
 from __future__ import annotations
 
+import errno
+import json
 import logging
+import os
 import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Set
 
+import usb_utils
 from usb_utils import (
-    USB_ROOT,
+    FALLOCATE_FILESYSTEMS,
     UsbPathError,
     UsbUnavailableError,
     check_usb_health,
     ensure_directory,
-    ensure_free_space,
     ensure_usb_ready,
+    fsync_directory,
+    invalidate_usb_health_cache,
+    prepare_usb_write,
     resolve_usb_path,
+    write_file,
 )
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 USB_DEFAULT_SUBFOLDER = "SimpleBooth"
+# Données et entrée de dossier synchronisées avant de rendre la main : la clé
+# peut être retirée sans attendre l'écriture différée du noyau
+USB_SYNC_ON_WRITE = os.environ.get("USB_SYNC_ON_WRITE", "1").strip().lower() not in {"0", "false", "no", "off"}
 
 
 @dataclass
 class PhotoMeta:
-    """Métadonnées minimalistes pour une photo stockée sur USB."""
+    """Métadonnées minimalistes pour une photo stockée sur USB.
+
+    Conservé pour compatibilité : ``list_usb_photos`` renvoie directement des
+    dictionnaires. ``__slots__`` explicite (``slots=True`` exige Python 3.10).
+    """
+
+    __slots__ = ("name", "path", "size", "mtime")
 
     name: str
     path: str
@@ -45,9 +69,11 @@ class PhotoMeta:
 def get_usb_mount_point() -> Optional[Path]:
     """Retourne le point de montage configuré si disponible."""
 
+    # check_usb_health a déjà validé le montage : pas de seconde vérification.
+    # USB_ROOT est lu sur le module car il change après une détection.
     health = check_usb_health()
-    if health.mounted and USB_ROOT is not None:
-        return USB_ROOT
+    if health.mounted and usb_utils.USB_ROOT is not None:
+        return usb_utils.USB_ROOT
     logger.info("[USB] Point de montage USB indisponible: %s", health.message)
     return None
 
@@ -78,9 +104,9 @@ def ensure_usb_folder_exists(subfolder: str = USB_DEFAULT_SUBFOLDER) -> Path:
         except Exception as exc:  # pragma: no cover - validation
             raise OSError(str(exc)) from exc
     else:
-        if USB_ROOT is None:
+        if usb_utils.USB_ROOT is None:
             raise OSError("Clé USB non détectée")
-        destination = USB_ROOT
+        destination = usb_utils.USB_ROOT
 
     try:
         ensure_directory(destination)
@@ -94,82 +120,357 @@ def ensure_usb_folder_exists(subfolder: str = USB_DEFAULT_SUBFOLDER) -> Path:
     return destination
 
 
+def _now_tag() -> str:
+    """Horodatage des noms de fichiers, sans objet datetime intermédiaire."""
+
+    return time.strftime("%Y%m%d_%H%M%S")
+
+
 def _generate_timestamp_name(original: Path, dest_name_timestamped: bool) -> str:
     if not dest_name_timestamped:
         return original.name
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = _now_tag()
     suffix = original.suffix or ".jpg"
     return f"{timestamp}{suffix}".replace(" ", "_")
 
 
-def _check_free_space(destination: Path, file_size: int) -> None:
+def _prepare_destination(subfolder: str, file_size: int) -> Path:
+    """Dossier de destination prêt à recevoir ``file_size`` octets (un seul contrôle)."""
+
     try:
-        ensure_free_space(destination, file_size)
+        return prepare_usb_write(subfolder, file_size)
     except UsbUnavailableError as exc:
         if exc.code == "no_space":
-            logger.error("[USB] Espace disque insuffisant sur %s", destination)
+            logger.error("[USB] Espace disque insuffisant pour %d octets", file_size)
             raise OSError(str(exc)) from exc
+        _rethrow_unavailable(exc)
+    except UsbPathError as exc:
+        raise OSError(str(exc)) from exc
+    except PermissionError as exc:
+        logger.error("[USB] Permission refusée pour créer %s: %s", subfolder, exc)
         raise
 
 
-def _build_unique_path(destination_folder: Path, filename: str) -> Path:
-    base_path = destination_folder / filename
-    candidate = base_path
+def _build_unique_path(destination_folder: Path, filename: str, existing: Optional[Set[str]] = None) -> Path:
+    """Retourne un chemin libre dans ``destination_folder``.
+
+    Les noms existants sont lus une seule fois (``existing`` permet de réutiliser
+    cet instantané entre plusieurs sauvegardes ; le nom retenu y est ajouté).
+    """
+
+    if existing is None:
+        with os.scandir(destination_folder) as it:
+            existing = {entry.name for entry in it}
+    stem, dot, extension = filename.rpartition(".")
+    if not stem:
+        # Pas d'extension (ou fichier caché) : même découpage que Path.stem
+        stem, dot, extension = filename, "", ""
+    suffix = dot + extension
+    candidate = filename
     counter = 1
-    while candidate.exists():
-        candidate = destination_folder / f"{base_path.stem}_{counter}{base_path.suffix}"
+    while candidate in existing:
+        candidate = f"{stem}_{counter}{suffix}"
         counter += 1
-    return candidate
+    existing.add(candidate)
+    return destination_folder / candidate
+
+
+_COPY_BUFSIZE = 1 << 20
+# Erreurs signalant qu'un appel système de copie n'est pas utilisable ici
+_FASTCOPY_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+
+def _copy_fd_range(src_fd: int, dst_fd: int, size: int) -> int:
+    copied = 0
+    while copied < size:
+        sent = os.copy_file_range(src_fd, dst_fd, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+def _copy_fd_sendfile(src_fd: int, dst_fd: int, size: int) -> int:
+    copied = 0
+    while copied < size:
+        sent = os.sendfile(dst_fd, src_fd, copied, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+# Tampon unique réutilisé par le repli userspace : pas d'allocation de 1 Mio
+# par copie (fragmentation du tas sur une borne allumée en continu)
+_COPY_BUF = bytearray(_COPY_BUFSIZE)
+_COPY_BUF_VIEW = memoryview(_COPY_BUF)
+_COPY_BUF_LOCK = threading.Lock()
+
+
+def _copy_fd_buffered(src_fd: int, dst_fd: int) -> int:
+    view = _COPY_BUF_VIEW
+    copied = 0
+    with _COPY_BUF_LOCK, open(src_fd, "rb", buffering=0, closefd=False) as source:
+        while True:
+            read = source.readinto(view)
+            if not read:
+                break
+            written = 0
+            while written < read:
+                written += os.write(dst_fd, view[written:read])
+            copied += read
+    return copied
+
+
+_KERNEL_COPIERS = tuple(
+    copier
+    for name, copier in (("copy_file_range", _copy_fd_range), ("sendfile", _copy_fd_sendfile))
+    if hasattr(os, name)
+)
+
+
+def _fastcopy(src_path: Path, dst_path: Path, durable: bool = False) -> int:
+    """Copie ``src_path`` vers ``dst_path`` dans le noyau quand c'est possible.
+
+    Essaie ``copy_file_range`` puis ``sendfile`` ; à défaut, boucle ``readinto``
+    avec un tampon de 1 Mio. Une copie noyau incomplète est terminée par la
+    boucle ``readinto`` ; une copie qui reste incomplète lève ``OSError`` et
+    le fichier partiel est supprimé. Les métadonnées sont reprises comme
+    ``copy2``. Avec ``durable``, les données sont sur le support au retour
+    (``fdatasync``).
+    """
+
+    cloexec = getattr(os, "O_CLOEXEC", 0)
+    src_fd = os.open(src_path, os.O_RDONLY | cloexec)
+    try:
+        size = os.fstat(src_fd).st_size
+        dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | cloexec, 0o644)
+        try:
+            copied = 0
+            for copier in _KERNEL_COPIERS:
+                try:
+                    copied = copier(src_fd, dst_fd, size)
+                except OSError as exc:
+                    # Repli seulement si rien n'a encore été écrit
+                    if exc.errno not in _FASTCOPY_UNSUPPORTED or os.lseek(dst_fd, 0, os.SEEK_END):
+                        raise
+                    continue
+                # copy_file_range peut renvoyer 0 dès le début sur certains
+                # systèmes de fichiers : essayer l'appel suivant
+                if copied:
+                    break
+            if copied < size:
+                # Reprise en espace utilisateur là où la copie noyau s'est arrêtée
+                # (sendfile n'avance pas la position de la source)
+                os.lseek(src_fd, copied, os.SEEK_SET)
+                os.lseek(dst_fd, copied, os.SEEK_SET)
+                copied += _copy_fd_buffered(src_fd, dst_fd)
+            if copied < size:
+                raise OSError(errno.EIO, f"Copie incomplète ({copied}/{size} octets)", str(dst_path))
+            if durable:
+                getattr(os, "fdatasync", os.fsync)(dst_fd)
+        finally:
+            os.close(dst_fd)
+    except OSError:
+        try:
+            os.unlink(dst_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src_path, dst_path)
+    return copied
+
+
+# Index des photos du dossier USB : le listage lit ce fichier au lieu de
+# parcourir le dossier tant qu'il est au moins aussi récent que le dossier.
+_MANIFEST_NAME = ".simplebooth_index.json"
+
+
+def _manifest_path(folder: Path) -> Path:
+    return folder / _MANIFEST_NAME
+
+
+def _read_fresh_manifest(folder: Path) -> Optional[dict]:
+    """Retourne les photos de l'index s'il reflète encore le dossier, sinon None.
+
+    L'index mémorise le ``st_mtime_ns`` du dossier qu'il décrit. Il n'est
+    valable que si le dossier a toujours ce mtime et que ce mtime est
+    strictement antérieur à celui de l'index : une modification externe
+    dans le même tic d'horloge (2 s sur vfat) ne passe pas inaperçue.
+    """
+
+    try:
+        folder_mtime_ns = os.stat(folder).st_mtime_ns
+        with open(_manifest_path(folder), "rb") as fh:
+            manifest_mtime_ns = os.fstat(fh.fileno()).st_mtime_ns
+            data = json.loads(fh.read())
+        photos = data.get("photos")
+        stored_mtime_ns = data.get("folder_mtime_ns")
+    except (OSError, ValueError, AttributeError):
+        return None
+    if stored_mtime_ns != folder_mtime_ns or folder_mtime_ns >= manifest_mtime_ns:
+        return None
+    return photos if isinstance(photos, dict) else None
+
+
+def _manifest_is_fresh(folder: Path) -> bool:
+    """Vrai si l'index reflète le dossier (aucune modification externe depuis)."""
+
+    return _read_fresh_manifest(folder) is not None
+
+
+def _write_manifest(folder: Path, mutate, folder_mtime_ns: int) -> None:
+    """Applique ``mutate(photos)`` à l'index sous verrou.
+
+    ``folder_mtime_ns`` est le mtime du dossier que l'index décrit après
+    la modification. L'index est réécrit en place (pas de renommage) pour
+    ne pas modifier le dossier lui-même.
+    """
+
+    fd = os.open(_manifest_path(folder), os.O_RDWR | os.O_CREAT | getattr(os, "O_CLOEXEC", 0), 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        with open(fd, "r+b", closefd=False) as fh:
+            try:
+                photos = json.loads(fh.read() or b"{}").get("photos") or {}
+            except (ValueError, AttributeError):
+                photos = {}
+            mutate(photos)
+            fh.seek(0)
+            payload = {"folder_mtime_ns": folder_mtime_ns, "photos": photos}
+            fh.write(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            fh.truncate()
+    finally:
+        os.close(fd)
+
+
+def _manifest_add(folder: Path, path: Path) -> None:
+    def add(photos: dict) -> None:
+        photos[path.name] = {"size": stats.st_size, "mtime": stats.st_mtime}
+
+    try:
+        stats = path.stat()
+        _write_manifest(folder, add, os.stat(folder).st_mtime_ns)
+    except OSError as exc:
+        logger.debug("[USB] Index non mis à jour pour %s: %s", path, exc)
+
+
+def _manifest_remove(folder: Path, name: str) -> None:
+    try:
+        _write_manifest(folder, lambda photos: photos.pop(name, None), os.stat(folder).st_mtime_ns)
+    except OSError as exc:
+        logger.debug("[USB] Index non mis à jour pour %s: %s", name, exc)
+
+
+def _manifest_rebuild(folder: Path, photos: List[dict], folder_mtime_ns: int) -> None:
+    def replace(entries: dict) -> None:
+        entries.clear()
+        entries.update({photo["name"]: {"size": photo["size"], "mtime": photo["mtime"]} for photo in photos})
+
+    try:
+        _write_manifest(folder, replace, folder_mtime_ns)
+    except OSError as exc:
+        logger.debug("[USB] Index non reconstruit pour %s: %s", folder, exc)
 
 
 def save_photo_to_usb(image_source, dest_name_timestamped: bool = True, subfolder: str = USB_DEFAULT_SUBFOLDER) -> Path:
     """Sauvegarde une photo (chemin ou bytes) sur la clé USB et retourne le chemin créé."""
 
-    destination_folder = ensure_usb_folder_exists(subfolder=subfolder)
-
     if isinstance(image_source, (str, Path)):
         source_path = Path(image_source)
-        if not source_path.exists():
-            raise FileNotFoundError(f"Fichier introuvable: {source_path}")
-        file_size = source_path.stat().st_size
-        _check_free_space(destination_folder, file_size)
+        try:
+            file_size = source_path.stat().st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Fichier introuvable: {source_path}") from None
+        destination_folder = _prepare_destination(subfolder, file_size)
+        # Un index déjà périmé n'est pas complété : le prochain listage le reconstruit
+        manifest_fresh = _manifest_is_fresh(destination_folder)
         dest_name = _generate_timestamp_name(source_path, dest_name_timestamped)
         dest_path = _build_unique_path(destination_folder, dest_name)
-        shutil.copy2(source_path, dest_path)
+        try:
+            _fastcopy(source_path, dest_path, durable=USB_SYNC_ON_WRITE)
+            if USB_SYNC_ON_WRITE:
+                fsync_directory(destination_folder)
+        except OSError:
+            invalidate_usb_health_cache()
+            raise
+        if manifest_fresh:
+            _manifest_add(destination_folder, dest_path)
         logger.info("[USB] Photo copiée sur USB: %s", dest_path)
         return dest_path
 
     if isinstance(image_source, (bytes, bytearray)):
-        data = bytes(image_source)
+        # Pas de copie : write_file écrit directement depuis une memoryview
+        data = image_source
         file_size = len(data)
-        _check_free_space(destination_folder, file_size)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        dest_path = _build_unique_path(destination_folder, f"{timestamp}.jpg")
-        with open(dest_path, "wb") as output:
-            output.write(data)
+        destination_folder = _prepare_destination(subfolder, file_size)
+        manifest_fresh = _manifest_is_fresh(destination_folder)
+        dest_path = _build_unique_path(destination_folder, f"{_now_tag()}.jpg")
+        preallocate = check_usb_health().filesystem in FALLOCATE_FILESYSTEMS
+        try:
+            write_file(dest_path, data, durable=USB_SYNC_ON_WRITE, preallocate=preallocate)
+            if USB_SYNC_ON_WRITE:
+                fsync_directory(destination_folder)
+        except OSError:
+            invalidate_usb_health_cache()
+            raise
+        if manifest_fresh:
+            _manifest_add(destination_folder, dest_path)
         logger.info("[USB] Photo sauvegardée depuis bytes: %s", dest_path)
         return dest_path
 
     raise TypeError("image_source doit être un chemin ou des octets")
 
 
+# Une seule écriture USB à la fois : la clé est plus lente en accès concurrents
+_usb_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usb-writer")
+
+
+def save_photo_to_usb_async(
+    image_source, dest_name_timestamped: bool = True, subfolder: str = USB_DEFAULT_SUBFOLDER
+) -> Future:
+    """Planifie ``save_photo_to_usb`` sur le thread d'écriture USB.
+
+    Retourne un ``Future`` dont le résultat est le chemin créé (ou l'exception
+    levée par la sauvegarde).
+    """
+
+    return _usb_writer.submit(save_photo_to_usb, image_source, dest_name_timestamped, subfolder)
+
+
 def list_usb_photos(subfolder: str = USB_DEFAULT_SUBFOLDER) -> List[dict]:
     """Liste les photos présentes sur la clé USB."""
 
     folder = ensure_usb_folder_exists(subfolder=subfolder)
-    photos: List[PhotoMeta] = []
-    for file in sorted(folder.glob("*"), key=lambda p: p.stat().st_mtime, reverse=True):
-        if not file.is_file():
-            continue
-        stats = file.stat()
-        photos.append(PhotoMeta(
-            name=file.name,
-            path=str(file),
-            size=stats.st_size,
-            mtime=stats.st_mtime,
-        ))
+    folder_str = os.fspath(folder)
+    manifest = _read_fresh_manifest(folder)
+    # Dictionnaires construits directement à partir de chaînes : pas d'objet
+    # Path ni de PhotoMeta intermédiaire par photo
+    if manifest is not None:
+        photos = [
+            {"name": name, "path": os.path.join(folder_str, name), "size": meta["size"], "mtime": meta["mtime"]}
+            for name, meta in manifest.items()
+        ]
+    else:
+        # mtime lu avant le parcours : un changement pendant le scan invalide l'index
+        folder_mtime_ns = os.stat(folder_str).st_mtime_ns
+        # Un seul parcours : DirEntry met en cache le type et le stat de chaque entrée
+        photos = []
+        with os.scandir(folder_str) as it:
+            for entry in it:
+                if entry.name == _MANIFEST_NAME or not entry.is_file(follow_symlinks=False):
+                    continue
+                stats = entry.stat()
+                photos.append(
+                    {"name": entry.name, "path": entry.path, "size": stats.st_size, "mtime": stats.st_mtime}
+                )
+        _manifest_rebuild(folder, photos, folder_mtime_ns)
+    photos.sort(key=itemgetter("mtime"), reverse=True)
     logger.info("[USB] %d photos détectées sur la clé", len(photos))
-    return [photo.to_dict() for photo in photos]
+    return photos
 
 
 def delete_usb_photo(path: str, subfolder: str = USB_DEFAULT_SUBFOLDER) -> bool:
@@ -177,11 +478,16 @@ def delete_usb_photo(path: str, subfolder: str = USB_DEFAULT_SUBFOLDER) -> bool:
 
     folder = ensure_usb_folder_exists(subfolder=subfolder)
     target = folder / Path(path).name
+    if target.name == _MANIFEST_NAME:
+        return False
     if not target.exists():
         logger.warning("[USB] Photo introuvable pour suppression: %s", target)
         return False
+    manifest_fresh = _manifest_is_fresh(folder)
     try:
         target.unlink()
+        if manifest_fresh:
+            _manifest_remove(folder, target.name)
         logger.info("[USB] Photo supprimée: %s", target)
         return True
     except PermissionError as exc:
@@ -2,21 +2,28 @@
 from __future__ import annotations
 
 import errno
+import itertools
 import json
 import logging
 import os
 import shutil
 import subprocess
-import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, KeysView, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 _USB_ROOT_ENV = os.environ.get("USB_ROOT", "")
 USB_ROOT: Optional[Path] = Path(_USB_ROOT_ENV) if _USB_ROOT_ENV else None
 SAVE_DIR: Optional[Path] = None
+# Formes texte de USB_ROOT / SAVE_DIR, tenues à jour avec les chemins
+_USB_ROOT_STR: Optional[str] = None
+_SAVE_DIR_STR: Optional[str] = None
 
 
 def _resolve_candidate(path: Path) -> Path:
@@ -55,18 +62,36 @@ def _ensure_compat_symlink(target: Optional[Path]) -> None:
         logger.debug("[USB] Erreur lors de la création du lien symbolique %s: %s", symlink_path, exc)
 
 
+# Dernière cible appliquée au lien /mnt/usb (sentinelle : jamais appliquée)
+_UNSET = object()
+_compat_symlink_target: object = _UNSET
+
+
+def _sync_compat_symlink(target: Optional[Path]) -> None:
+    """Update ``/mnt/usb`` only when the USB root actually changed."""
+
+    global _compat_symlink_target
+    if target == _compat_symlink_target:
+        return
+    _ensure_compat_symlink(target)
+    _compat_symlink_target = target
+
+
 def _set_usb_paths(root: Optional[Path]) -> Tuple[Optional[Path], Optional[Path]]:
-    global USB_ROOT, SAVE_DIR
+    global USB_ROOT, SAVE_DIR, _USB_ROOT_STR, _SAVE_DIR_STR
     if root is None:
         USB_ROOT = None
         SAVE_DIR = None
-        _ensure_compat_symlink(None)
+        _USB_ROOT_STR = _SAVE_DIR_STR = None
+        _sync_compat_symlink(None)
         return USB_ROOT, SAVE_DIR
 
     resolved_root = _resolve_candidate(root)
     USB_ROOT = resolved_root
+    _USB_ROOT_STR = str(resolved_root)
     save_dir = resolved_root / "sauvegardes"
     SAVE_DIR = save_dir
+    _SAVE_DIR_STR = str(save_dir)
     try:
         save_dir.mkdir(parents=True, exist_ok=True)
     except FileNotFoundError:
@@ -76,47 +101,116 @@ def _set_usb_paths(root: Optional[Path]) -> Tuple[Optional[Path], Optional[Path]
         logger.debug("[USB] Impossible de créer le dossier de sauvegarde %s: %s", save_dir, exc)
     except OSError as exc:
         logger.debug("[USB] Erreur lors de la création du dossier de sauvegarde %s: %s", save_dir, exc)
-    _ensure_compat_symlink(USB_ROOT)
+    _sync_compat_symlink(USB_ROOT)
     return USB_ROOT, SAVE_DIR
 
 
-def find_usb_root() -> Optional[Path]:
-    """Detect the USB root directory using the configured environment or heuristics."""
+_MOUNT_PROBE_WORKERS = 8
+_MOUNT_PROBE_TIMEOUT_SECONDS = 2.0
+_ROOT_SCAN_TTL_SECONDS = 2.0
+_root_scan_lock = threading.Lock()
+_root_scan_cache: Tuple[float, Optional[Path]] = (0.0, None)
 
-    if _USB_ROOT_ENV:
-        return _resolve_candidate(Path(_USB_ROOT_ENV))
 
-    candidates: List[Path] = []
+# os.access n'est pas fiable sur les montages réseau : sonde d'écriture réelle
+_NETWORK_FILESYSTEMS = frozenset({"nfs", "nfs4", "cifs", "smbfs", "smb3"})
+
+
+def _is_valid_mount(entry: Path) -> bool:
+    """Return True when the mount point ``entry`` is writable.
+
+    Local filesystems are trusted on ``os.access`` alone so detection writes
+    nothing; the probe file is reserved for network mounts.
+    """
+
+    if not os.access(entry, os.W_OK | os.X_OK):
+        logger.debug("[USB] %s non accessible en écriture", entry)
+        return False
+    mount = _find_mount_entry(entry)
+    if mount is not None and mount.filesystem in _NETWORK_FILESYSTEMS and test_write_access(entry) is not None:
+        logger.debug("[USB] Impossible d'écrire sur %s", entry)
+        return False
+    return True
+
+
+def _list_mount_candidates() -> List[Path]:
+    """Mounted directories under the usual automount bases, sorted by name."""
+
+    bases: List[str] = []
     user_name = os.environ.get("USER") or os.environ.get("USERNAME")
     if user_name:
-        candidates.append(Path("/media") / user_name)
-    candidates.extend([Path("/media"), Path("/run/media")])
+        bases.append(os.path.join("/media", user_name))
+    bases.extend(["/media", "/run/media"])
 
-    for base in candidates:
+    # La table des montages suffit : un point de montage listé existe déjà,
+    # inutile de le stat() ; le type de l'entrée vient du cache de scandir
+    mounted = known_mount_points()
+    candidates: List[Path] = []
+    for base in bases:
         try:
-            entries = sorted(p for p in base.iterdir() if p.is_dir())
+            with os.scandir(base) as it:
+                names = sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
         except FileNotFoundError:
             continue
         except PermissionError as exc:
             logger.debug("[USB] Accès refusé à %s: %s", base, exc)
             continue
-        for entry in entries:
-            if not entry.exists():
-                continue
-            mount_entry = _find_mount_entry(entry)
-            if mount_entry is None:
-                continue
-            if not os.access(entry, os.W_OK | os.X_OK):
-                logger.debug("[USB] %s non accessible en écriture", entry)
+        for name in names:
+            entry = os.path.join(base, name)
+            if entry in mounted:
+                candidates.append(Path(entry))
+    return candidates
+
+
+def _scan_usb_root() -> Optional[Path]:
+    candidates = _list_mount_candidates()
+    if not candidates:
+        return None
+
+    # Les vérifications sont lancées en parallèle : un périphérique lent
+    # (sondage udev en cours) ne retarde plus les autres candidats.
+    executor = ThreadPoolExecutor(
+        max_workers=min(_MOUNT_PROBE_WORKERS, len(candidates)),
+        thread_name_prefix="usb-probe",
+    )
+    try:
+        futures = [executor.submit(_is_valid_mount, entry) for entry in candidates]
+        deadline = time.monotonic() + _MOUNT_PROBE_TIMEOUT_SECONDS
+        for entry, future in zip(candidates, futures):
+            try:
+                valid = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                logger.debug("[USB] Vérification de %s trop lente, ignorée", entry)
                 continue
-            if _test_write_access(entry) is not None:
-                logger.debug("[USB] Impossible d'écrire sur %s", entry)
+            except Exception as exc:
+                logger.debug("[USB] Vérification de %s impossible: %s", entry, exc)
                 continue
-            return _resolve_candidate(entry)
-
+            if valid:
+                return _resolve_candidate(entry)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     return None
 
 
+def find_usb_root() -> Optional[Path]:
+    """Detect the USB root directory using the configured environment or heuristics.
+
+    The heuristic scan is reused for ``_ROOT_SCAN_TTL_SECONDS``.
+    """
+
+    global _root_scan_cache
+    if _USB_ROOT_ENV:
+        return _resolve_candidate(Path(_USB_ROOT_ENV))
+
+    with _root_scan_lock:
+        timestamp, cached = _root_scan_cache
+        if timestamp and time.monotonic() - timestamp < _ROOT_SCAN_TTL_SECONDS:
+            return cached
+        detected = _scan_usb_root()
+        _root_scan_cache = (time.monotonic(), detected)
+        return detected
+
+
 class UsbPathError(ValueError):
     """Raised when a requested path would escape from the USB root."""
 
@@ -150,35 +244,58 @@ class UsbHealth:
             "free_bytes": self.free_bytes,
             "detail": self.detail,
             "message": self.message,
-            "root": str(USB_ROOT) if USB_ROOT else None,
-            "path": str(USB_ROOT) if USB_ROOT else None,
-            "save_dir": str(SAVE_DIR) if SAVE_DIR else None,
+            "root": _USB_ROOT_STR,
+            "path": _USB_ROOT_STR,
+            "save_dir": _SAVE_DIR_STR,
         }
 
 
 @dataclass
 class MountEntry:
     device: str
-    mount_point: Path
+    mount_point: str
     filesystem: str
 
 
 def _decode_mount_value(value: str) -> str:
+    if "\\040" not in value:
+        return value
     return value.replace("\\040", " ")
 
 
-def _iter_mounts() -> Iterable[MountEntry]:
+def _read_proc_mounts() -> Optional[bytes]:
+    """Raw content of /proc/mounts, or None when procfs is not available."""
+
+    # Descripteur brut : ni TextIOWrapper ni décodage ligne par ligne
     try:
-        with open("/proc/mounts", "r", encoding="utf-8") as fh:
-            for line in fh:
-                parts = line.split()
-                if len(parts) < 3:
-                    continue
-                device = _decode_mount_value(parts[0])
-                mount_point = Path(_decode_mount_value(parts[1]))
-                fs_type = parts[2]
-                yield MountEntry(device=device, mount_point=mount_point, filesystem=fs_type)
+        fd = os.open("/proc/mounts", os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
     except FileNotFoundError:
+        return None
+    chunks = []
+    try:
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+
+def _iter_mounts() -> Iterable[MountEntry]:
+    content = _read_proc_mounts()
+    if content is not None:
+        for line in content.split(b"\n"):
+            # Seuls les trois premiers champs sont utiles, décodés à la demande
+            parts = line.split(None, 3)
+            if len(parts) < 3:
+                continue
+            device = _decode_mount_value(os.fsdecode(parts[0]))
+            mount_point = _decode_mount_value(os.fsdecode(parts[1]))
+            fs_type = parts[2].decode("ascii", "replace")
+            yield MountEntry(device=device, mount_point=mount_point, filesystem=fs_type)
+    else:
         # macOS or systems without /proc
         try:
             output = subprocess.check_output(["mount"], text=True)
@@ -193,51 +310,143 @@ def _iter_mounts() -> Iterable[MountEntry]:
             rest = parts[1].split(" type ")
             if len(rest) < 2:
                 continue
-            mount_point = Path(rest[0].strip())
+            mount_point = rest[0].strip()
             fs_type = rest[1].split()[0]
             yield MountEntry(device=device, mount_point=mount_point, filesystem=fs_type)
 
 
+_MOUNT_TABLE_TTL_SECONDS = 1.0
+_mount_table_lock = threading.Lock()
+_mount_table_cache: Tuple[float, Optional[Dict[str, MountEntry]]] = (0.0, None)
+
+
+def _load_mount_table() -> Dict[str, MountEntry]:
+    """Mount table keyed by mount point, reparsed at most every ``_MOUNT_TABLE_TTL_SECONDS``.
+
+    The mtime of /proc/mounts is not meaningful on procfs, hence the TTL.
+    """
+
+    global _mount_table_cache
+    with _mount_table_lock:
+        timestamp, table = _mount_table_cache
+        if table is not None and time.monotonic() - timestamp < _MOUNT_TABLE_TTL_SECONDS:
+            return table
+        # Pour un point de montage empilé, la dernière entrée est celle visible
+        table = {entry.mount_point: entry for entry in _iter_mounts()}
+        _mount_table_cache = (time.monotonic(), table)
+        return table
+
+
 def _find_mount_entry(path: Path) -> Optional[MountEntry]:
-    for entry in _iter_mounts():
-        if entry.mount_point == path:
-            return entry
-    return None
+    # Clés en chaînes : aucun objet Path construit par ligne de /proc/mounts
+    return _load_mount_table().get(os.fspath(path))
+
 
+def known_mount_points() -> KeysView[str]:
+    """Mount points currently listed in the (cached) mount table.
 
-def _test_write_access(directory: Path) -> Optional[OSError]:
-    probe_name = directory / f".usb_write_test_{uuid.uuid4().hex}"
+    Returns a view over the cached table: membership tests cost no copy.
+    """
+
+    return _load_mount_table().keys()
+
+
+_PROBE_COUNTER = itertools.count()
+
+
+def test_write_access(directory: Path) -> Optional[OSError]:
+    """Write then remove a small probe file; return the error, or None if writable."""
+
+    # pid + compteur : nom unique sans lire /dev/urandom
+    probe_name = os.path.join(directory, f".usb_write_test_{os.getpid()}_{next(_PROBE_COUNTER)}")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
     try:
-        with open(probe_name, "wb") as fh:
-            fh.write(b"test")
-        probe_name.unlink(missing_ok=True)
+        try:
+            fd = os.open(probe_name, flags, 0o600)
+        except FileExistsError:
+            # Reste d'un processus précédent ayant eu le même pid
+            os.unlink(probe_name)
+            fd = os.open(probe_name, flags, 0o600)
+        try:
+            os.write(fd, b"test")
+        finally:
+            os.close(fd)
+        os.unlink(probe_name)
         return None
     except OSError as exc:
         try:
-            probe_name.unlink(missing_ok=True)
+            os.unlink(probe_name)
         except OSError:
             pass
         return exc
 
 
-def check_usb_health(test_write: bool = False) -> UsbHealth:
-    """Return the health information for the configured USB mount."""
+_HEALTH_TTL_SECONDS = 1.5
+_WRITE_HEALTH_TTL_SECONDS = 0.2
 
-    global USB_ROOT, SAVE_DIR
 
-    if USB_ROOT is None:
-        detected = find_usb_root()
-        if detected is not None:
-            _set_usb_paths(detected)
-        else:
-            return UsbHealth(
-                mounted=False,
-                writable=False,
-                filesystem=None,
-                free_bytes=None,
-                detail="not_detected",
-                message="Aucune clé USB détectée.",
-            )
+class _CachedHealth:
+    """Keep the last health probe of each kind (read-only / write) for a short time."""
+
+    def __init__(self, ttl: float, write_ttl: float) -> None:
+        self._ttls = {False: ttl, True: write_ttl}
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, test_write: bool, compute, force_write_probe: bool = False) -> UsbHealth:
+        key = (test_write, force_write_probe)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self._ttls[test_write]:
+                return cached[1]
+            value = compute()
+            self._entries[key] = (time.monotonic(), value)
+            return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_HEALTH_CACHE = _CachedHealth(_HEALTH_TTL_SECONDS, _WRITE_HEALTH_TTL_SECONDS)
+
+
+def invalidate_usb_health_cache() -> None:
+    """Drop cached health probes (after a failed write or an unmount)."""
+
+    _HEALTH_CACHE.invalidate()
+
+
+def check_usb_health(test_write: bool = False, force_write_probe: bool = False) -> UsbHealth:
+    """Return the health information for the configured USB mount.
+
+    Read-only probes are cached for ``_HEALTH_TTL_SECONDS`` so that bursts of
+    API calls do not rescan the mount table. Write probes are cached for
+    ``_WRITE_HEALTH_TTL_SECONDS`` so that chained operations share one probe.
+
+    With ``test_write`` the probe file is only written when ``os.access``
+    denies access or when ``force_write_probe`` asks for it (stale mounts).
+    """
+
+    return _HEALTH_CACHE.get(
+        test_write,
+        lambda: _probe_usb_health(test_write=test_write, force_write_probe=force_write_probe),
+        force_write_probe=force_write_probe,
+    )
+
+
+def _probe_usb_health(test_write: bool, force_write_probe: bool = False) -> UsbHealth:
+    global SAVE_DIR, _SAVE_DIR_STR
+
+    if _detect_usb_root() is None:
+        return UsbHealth(
+            mounted=False,
+            writable=False,
+            filesystem=None,
+            free_bytes=None,
+            detail="not_detected",
+            message="Aucune clé USB détectée.",
+        )
 
     assert USB_ROOT is not None
     root = USB_ROOT
@@ -274,8 +483,7 @@ def check_usb_health(test_write: bool = False) -> UsbHealth:
         )
 
     try:
-        usage = shutil.disk_usage(root)
-        free_bytes = usage.free
+        free_bytes = _free_bytes(root)
     except PermissionError as exc:
         return UsbHealth(
             mounted=True,
@@ -308,18 +516,19 @@ def check_usb_health(test_write: bool = False) -> UsbHealth:
             message=f"Impossible de préparer {save_dir}: {exc}",
         )
 
-    SAVE_DIR = save_dir
+    if save_dir != SAVE_DIR:
+        SAVE_DIR = save_dir
+        _SAVE_DIR_STR = str(save_dir)
 
-    writable = os.access(save_dir, os.W_OK | os.X_OK)
+    writable_via_access = os.access(save_dir, os.W_OK | os.X_OK)
+    writable = writable_via_access
     detail = None
     message = None
-    if not writable:
-        detail = "permission_denied"
-        message = "Droits insuffisants pour écrire sur la clé USB."
-    elif test_write:
-        error = _test_write_access(save_dir)
+    if test_write and (force_write_probe or not writable_via_access):
+        # Sonde réelle seulement si os.access refuse ou si elle est exigée
+        error = test_write_access(save_dir)
+        writable = error is None
         if error is not None:
-            writable = False
             detail = "io_error"
             message = str(error)
             if isinstance(error, PermissionError):
@@ -331,6 +540,9 @@ def check_usb_health(test_write: bool = False) -> UsbHealth:
             elif error.errno == errno.ENOSPC:
                 detail = "no_space"
                 message = "Espace disque insuffisant sur la clé USB."
+    elif not writable:
+        detail = "permission_denied"
+        message = "Droits insuffisants pour écrire sur la clé USB."
 
     return UsbHealth(
         mounted=True,
@@ -360,36 +572,73 @@ def _ensure_relative_path(relative_path: str) -> Path:
     return path_obj
 
 
+# Systèmes de fichiers sans liens symboliques : une jointure normalisée suffit
+_SYMLINK_FREE_FILESYSTEMS = frozenset({"vfat", "msdos", "exfat"})
+
+
+def _join_usb_path(base: Path, relative: Path) -> Path:
+    """Join a validated relative path (no ``.``/``..`` parts) under ``base``.
+
+    The join is only canonicalised with ``resolve`` when the USB filesystem
+    can hold symlinks; FAT/exFAT keys skip the per-component readlink/lstat.
+    """
+
+    candidate = Path(os.path.normpath(os.path.join(base, relative)))
+    entry = _find_mount_entry(USB_ROOT) if USB_ROOT is not None else None
+    if entry is not None and entry.filesystem in _SYMLINK_FREE_FILESYSTEMS:
+        return candidate
+    return candidate.resolve(strict=False)
+
+
 def resolve_usb_path(relative_path: str, base: Optional[Path] = None) -> Path:
+    # USB_ROOT est déjà résolu par _set_usb_paths
     root = _require_usb_root()
-    base_path = (base or root).resolve()
+    base_path = root if base is None else base.resolve()
     if not _is_subpath(base_path, root):
         raise UsbPathError("Base en dehors de la clé USB")
 
     path_obj = _ensure_relative_path(relative_path)
-    candidate = (base_path / path_obj).resolve()
+    candidate = _join_usb_path(base_path, path_obj)
     if not _is_subpath(candidate, base_path):
         raise UsbPathError("Chemin hors de la clé USB")
     return candidate
 
 
 def _is_subpath(path: Path, parent: Path) -> bool:
-    try:
-        path.relative_to(parent)
+    # Comparaison de chaînes sur des chemins déjà normalisés : aucun objet
+    # PurePath intermédiaire, aucun appel système
+    path_str = os.fspath(path)
+    parent_str = os.fspath(parent)
+    if path_str == parent_str:
         return True
-    except ValueError:
-        return False
+    prefix = parent_str if parent_str.endswith(os.sep) else parent_str + os.sep
+    return path_str.startswith(prefix)
+
+
+_detect_lock = threading.Lock()
+
+
+def _detect_usb_root() -> Optional[Path]:
+    """Return USB_ROOT, running the first-use detection if it is not set yet.
+
+    The lock keeps concurrent first requests from applying the result twice.
+    """
+
+    if USB_ROOT is not None:
+        return USB_ROOT
+    with _detect_lock:
+        if USB_ROOT is None:
+            detected = find_usb_root()
+            if detected is not None:
+                _set_usb_paths(detected)
+        return USB_ROOT
 
 
 def _require_usb_root() -> Path:
-    global USB_ROOT
-    if USB_ROOT is None:
-        detected = find_usb_root()
-        if detected is not None:
-            _set_usb_paths(detected)
-    if USB_ROOT is None:
+    root = _detect_usb_root()
+    if root is None:
         raise UsbUnavailableError("not_detected", "Clé USB non détectée.")
-    return USB_ROOT
+    return root
 
 
 def ensure_directory(path: Path) -> Path:
@@ -399,14 +648,14 @@ def ensure_directory(path: Path) -> Path:
 
 def ensure_save_directory(subdir: Optional[str] = None) -> Path:
     root = _require_usb_root()
-    base_dir = (SAVE_DIR or (root / "sauvegardes")).resolve(strict=False)
+    base_dir = SAVE_DIR or (root / "sauvegardes")
     if not _is_subpath(base_dir, root):
         raise UsbPathError("Le dossier de sauvegarde est hors de la clé USB")
     ensure_directory(base_dir)
 
     if subdir:
         relative_subdir = _ensure_relative_path(subdir)
-        candidate = (base_dir / relative_subdir).resolve(strict=False)
+        candidate = _join_usb_path(base_dir, relative_subdir)
         if not _is_subpath(candidate, root):
             raise UsbPathError("Sous-dossier hors de la clé USB")
         ensure_directory(candidate)
@@ -415,23 +664,26 @@ def ensure_save_directory(subdir: Optional[str] = None) -> Path:
     return base_dir
 
 
+_FORBIDDEN_NAMES = frozenset({".", ".."})
+
+
 def validate_filename(filename: str) -> str:
     if not filename:
         raise UsbPathError("Nom de fichier manquant")
     filename = filename.strip()
     if not filename:
         raise UsbPathError("Nom de fichier vide")
-    if any(sep and sep in filename for sep in (os.sep, os.altsep) if sep):
+    if os.sep in filename or (os.altsep and os.altsep in filename):
         raise UsbPathError("Le nom de fichier ne doit pas contenir de séparateur")
-    if filename in (".", ".."):
+    if filename in _FORBIDDEN_NAMES:
         raise UsbPathError("Nom de fichier invalide")
     if "\x00" in filename:
         raise UsbPathError("Caractère nul interdit")
     return filename
 
 
-def ensure_usb_ready(for_writing: bool = False) -> UsbHealth:
-    health = check_usb_health(test_write=for_writing)
+def ensure_usb_ready(for_writing: bool = False, force_write_probe: bool = False) -> UsbHealth:
+    health = check_usb_health(test_write=for_writing, force_write_probe=force_write_probe)
     if not health.mounted:
         raise UsbUnavailableError(health.detail or "not_mounted", health.message or "Clé USB non montée.")
     if for_writing and not health.writable:
@@ -442,19 +694,50 @@ def ensure_usb_ready(for_writing: bool = False) -> UsbHealth:
     return health
 
 
-def ensure_free_space(target_dir: Path, required_bytes: int) -> None:
+def _free_bytes(path: Path) -> int:
+    # statvfs direct : pas de namedtuple intermédiaire de shutil.disk_usage
+    if not hasattr(os, "statvfs"):
+        return shutil.disk_usage(path).free
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+
+def ensure_free_space(target_dir: Path, required_bytes: int, known_free: Optional[int] = None) -> None:
+    """Raise ``no_space`` when ``required_bytes`` do not fit on the USB key.
+
+    ``known_free`` (usually ``UsbHealth.free_bytes``) saves the statvfs call.
+    """
+
     if required_bytes <= 0:
         return
-    usage = shutil.disk_usage(target_dir)
-    if usage.free < required_bytes:
+    free = _free_bytes(target_dir) if known_free is None else known_free
+    if free < required_bytes:
         raise UsbUnavailableError("no_space", "Espace disque insuffisant sur la clé USB.", status_code=507)
 
 
+def prepare_usb_write(subfolder: Optional[str], required_bytes: int) -> Path:
+    """Validate the mount, resolve and create ``subfolder`` and check free space in one pass.
+
+    The free space comes from the health probe already made for the mount
+    check; ``os.statvfs`` is only called when the probe could not read it.
+    """
+
+    health = ensure_usb_ready(for_writing=True)
+    if subfolder:
+        destination = resolve_usb_path(subfolder)
+    else:
+        destination = _require_usb_root()
+    ensure_directory(destination)
+
+    ensure_free_space(destination, required_bytes, known_free=health.free_bytes)
+    return destination
+
+
 def prepare_save_path(filename: str, subdir: Optional[str] = None) -> Path:
     validate_filename(filename)
-    root = _require_usb_root().resolve(strict=False)
+    root = _require_usb_root()
     target_dir = ensure_save_directory(subdir=subdir)
-    destination = (target_dir / filename).resolve(strict=False)
+    destination = _join_usb_path(target_dir, Path(filename))
     if not _is_subpath(destination, root):
         raise UsbPathError("Chemin de sauvegarde hors de la clé USB")
     return destination
@@ -467,26 +750,33 @@ def list_directory(relative_path: str = "") -> dict:
         target = resolve_usb_path(relative_path)
     else:
         target = root
-    if not target.exists():
-        raise FileNotFoundError("Le dossier demandé n'existe pas sur la clé USB")
-    if not target.is_dir():
-        raise NotADirectoryError("Le chemin demandé n'est pas un dossier")
 
+    # scandir signale lui-même un dossier absent ou un fichier : pas de stat préalable
+    try:
+        with os.scandir(target) as it:
+            dir_entries = sorted(it, key=lambda e: e.name.lower())
+    except FileNotFoundError:
+        raise FileNotFoundError("Le dossier demandé n'existe pas sur la clé USB") from None
+    except NotADirectoryError:
+        raise NotADirectoryError("Le chemin demandé n'est pas un dossier") from None
+
+    # Chemins relatifs par découpage de chaîne : les entrées sont sous ``root``
+    prefix_len = len(os.path.join(os.fspath(root), ""))
     entries: List[dict] = []
-    for entry in sorted(target.iterdir(), key=lambda p: p.name.lower()):
+    for entry in dir_entries:
         try:
             stat_result = entry.stat()
+            entry_type = "directory" if entry.is_dir() else "file"
         except OSError as exc:
-            logger.warning("[USB] Impossible de lire %s: %s", entry, exc)
+            logger.warning("[USB] Impossible de lire %s: %s", entry.path, exc)
             continue
-        entry_type = "directory" if entry.is_dir() else "file"
         entries.append(
             {
                 "name": entry.name,
                 "type": entry_type,
                 "size": stat_result.st_size,
                 "mtime": stat_result.st_mtime,
-                "path": str(entry.relative_to(root)),
+                "path": entry.path[prefix_len:],
             }
         )
     return {
@@ -502,24 +792,101 @@ def make_directory(relative_path: str) -> Path:
     return target
 
 
+_HAS_DSYNC_WRITE = hasattr(os, "pwritev") and hasattr(os, "RWF_DSYNC")
+_DSYNC_UNSUPPORTED = {errno.EINVAL, errno.EOPNOTSUPP, errno.ENOSYS}
+_HAS_FALLOCATE = hasattr(os, "posix_fallocate")
+# glibc émule posix_fallocate (écriture bloc par bloc) sur les systèmes de
+# fichiers sans fallocate natif, dont vfat/exfat : préallouer seulement ici
+FALLOCATE_FILESYSTEMS = frozenset({"ext4", "xfs", "btrfs", "f2fs"})
+
+
+def write_file(path: Path, data: bytes, durable: bool = False, preallocate: bool = False) -> int:
+    """Write ``data`` to ``path`` through a raw file descriptor.
+
+    Skips the buffered IO layer: the payload goes to the kernel in as few
+    ``write`` calls as it accepts, without intermediate copies. With
+    ``durable=True`` the data has reached the device when the call returns,
+    using ``pwritev(..., RWF_DSYNC)`` where available instead of write + fsync.
+    ``preallocate=True`` reserves the extent up front with ``posix_fallocate``
+    and fails fast with ``ENOSPC`` before any byte is written.
+    """
+
+    view = memoryview(data)
+    size = len(view)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        if preallocate and _HAS_FALLOCATE and size:
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError as exc:
+                if exc.errno == errno.ENOSPC:
+                    raise
+                logger.debug("[USB] Préallocation impossible pour %s: %s", path, exc)
+        written = 0
+        if durable and _HAS_DSYNC_WRITE:
+            try:
+                while written < size:
+                    written += os.pwritev(fd, [view[written:]], written, os.RWF_DSYNC)
+                return written
+            except OSError as exc:
+                if exc.errno not in _DSYNC_UNSUPPORTED:
+                    raise
+                os.lseek(fd, written, os.SEEK_SET)
+        while written < size:
+            written += os.write(fd, view[written:])
+        if durable:
+            getattr(os, "fdatasync", os.fsync)(fd)
+    finally:
+        os.close(fd)
+    return written
+
+
+def fsync_directory(directory: Path) -> None:
+    """Make the entries of ``directory`` durable (no-op where unsupported)."""
+
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError as exc:
+        logger.debug("[USB] Impossible d'ouvrir %s pour fsync: %s", directory, exc)
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError as exc:
+        # Certains systèmes de fichiers refusent fsync sur un dossier
+        logger.debug("[USB] fsync du dossier %s impossible: %s", directory, exc)
+    finally:
+        os.close(dir_fd)
+
+
 def save_content(filename: str, data: bytes, subdir: Optional[str] = None) -> Path:
     health = ensure_usb_ready(for_writing=True)
     destination = prepare_save_path(filename, subdir=subdir)
 
     data_size = len(data)
-    if health.free_bytes is not None and health.free_bytes < data_size:
-        raise UsbUnavailableError("no_space", "Espace disque insuffisant sur la clé USB.", status_code=507)
-
-    ensure_free_space(destination.parent, data_size)
+    # L'espace libre du sondage de santé suffit : un seul statvfs au plus
+    ensure_free_space(destination.parent, data_size, known_free=health.free_bytes)
 
-    with open(destination, "wb") as fh:
-        fh.write(data)
+    try:
+        write_file(destination, data, preallocate=health.filesystem in FALLOCATE_FILESYSTEMS)
+    except OSError as exc:
+        invalidate_usb_health_cache()
+        if exc.errno == errno.ENOSPC:
+            raise UsbUnavailableError("no_space", "Espace disque insuffisant sur la clé USB.", status_code=507) from exc
+        raise
     return destination
 
 
+_HEALTH_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False).encode
+
+
 def pretty_print_health(health: UsbHealth) -> str:
-    return json.dumps(health.to_dict(), indent=2, ensure_ascii=False)
+    return _HEALTH_ENCODER(health.to_dict())
 
 
-_set_usb_paths(find_usb_root())
+# La détection heuristique est différée au premier usage (_detect_usb_root)
+if _USB_ROOT_ENV:
+    _set_usb_paths(Path(_USB_ROOT_ENV))
 